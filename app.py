@@ -7,6 +7,8 @@ import asyncio
 import logging
 from typing import Optional
 
+from startup_profiler import profiler
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -38,12 +40,14 @@ async def run_polling_mode():
     
     try:
         # Import bot components
-        from core.bot import bot_instance
-        from core.handler.commands import load_commands, register_commands
-        from core.handler.events import load_events, register_events
-        from core.handler.message import load_message_handlers
-        from core.pid_manager import pid_manager
-        import config
+        with profiler.stage("config load"):
+            import config
+        with profiler.stage("core import"):
+            from core.bot import bot_instance
+            from core.handler.commands import load_commands, register_commands
+            from core.handler.events import load_events, register_events
+            from core.handler.message import load_message_handlers
+            from core.pid_manager import pid_manager
         
         print_banner()
         
@@ -55,7 +59,8 @@ async def run_polling_mode():
         
         # Load and register commands
         try:
-            loaded, failed = load_commands()
+            with profiler.stage("load commands"):
+                loaded, failed = load_commands()
             logger.info(f"Commands loaded: {loaded}, failed: {failed}")
             if failed > 0:
                 logger.warning(f"{failed} commands failed to load but bot will continue")
@@ -64,7 +69,8 @@ async def run_polling_mode():
             return False
         
         try:
-            register_commands()
+            with profiler.stage("register commands"):
+                register_commands()
             logger.info("Commands registered successfully")
         except Exception as e:
             logger.error(f"Critical error registering commands: {e}")
@@ -72,7 +78,8 @@ async def run_polling_mode():
         
         # Load and register events
         try:
-            loaded, failed = load_events()
+            with profiler.stage("load events"):
+                loaded, failed = load_events()
             logger.info(f"Events loaded: {loaded}, failed: {failed}")
             if failed > 0:
                 logger.warning(f"{failed} events failed to load but bot will continue")
@@ -98,6 +105,7 @@ async def run_polling_mode():
             return False
         
         # Start polling
+        profiler.report()
         logger.info("Starting bot polling...")
         await bot_instance.start_polling()
         return True
@@ -48,7 +48,8 @@ def load_config() -> Dict[str, Any]:
             "user_tracking": os.getenv("USER_TRACKING"),
             "broadcast_system": os.getenv("BROADCAST_SYSTEM"),
             "admin_management": os.getenv("ADMIN_MANAGEMENT"),
-            "hot_reload": os.getenv("HOT_RELOAD")
+            "hot_reload": os.getenv("HOT_RELOAD"),
+            "import_warmup": os.getenv("IMPORT_WARMUP")
         },
         "apis": {
             "version_url": os.getenv("VERSION_URL"),
@@ -73,6 +74,19 @@ def load_config() -> Dict[str, Any]:
         "performance": {
             "max_workers": int(os.getenv("MAX_WORKERS")) if os.getenv("MAX_WORKERS") else None,
             "timeout": int(os.getenv("TIMEOUT")) if os.getenv("TIMEOUT") else None,
+            "update_queue_size": int(os.getenv("UPDATE_QUEUE_SIZE")) if os.getenv("UPDATE_QUEUE_SIZE") else None,
+            "webhook_workers": int(os.getenv("WEBHOOK_WORKERS")) if os.getenv("WEBHOOK_WORKERS") else None,
+            "loop_stall_threshold": float(os.getenv("LOOP_STALL_THRESHOLD")) if os.getenv("LOOP_STALL_THRESHOLD") else None,
+            "http_pool_size": int(os.getenv("HTTP_POOL_SIZE")) if os.getenv("HTTP_POOL_SIZE") else None,
+            "http_keepalive": int(os.getenv("HTTP_KEEPALIVE")) if os.getenv("HTTP_KEEPALIVE") else None,
+            "upload_timeout": int(os.getenv("UPLOAD_TIMEOUT")) if os.getenv("UPLOAD_TIMEOUT") else None,
+            "rate_limit_global": float(os.getenv("RATE_LIMIT_GLOBAL")) if os.getenv("RATE_LIMIT_GLOBAL") else None,
+            "rate_limit_chat": float(os.getenv("RATE_LIMIT_CHAT")) if os.getenv("RATE_LIMIT_CHAT") else None,
+            "rate_limit_group_per_minute": float(os.getenv("RATE_LIMIT_GROUP_PER_MINUTE")) if os.getenv("RATE_LIMIT_GROUP_PER_MINUTE") else None,
+            "broadcast_concurrency": int(os.getenv("BROADCAST_CONCURRENCY")) if os.getenv("BROADCAST_CONCURRENCY") else None,
+            "download_workers": int(os.getenv("DOWNLOAD_WORKERS")) if os.getenv("DOWNLOAD_WORKERS") else None,
+            "heavy_workers": int(os.getenv("HEAVY_WORKERS")) if os.getenv("HEAVY_WORKERS") else None,
+            "search_cache_ttl": int(os.getenv("SEARCH_CACHE_TTL")) if os.getenv("SEARCH_CACHE_TTL") else None,
             "rate_limit": {
                 "enabled": os.getenv("RATE_LIMIT_ENABLED"),
                 "max_requests": int(os.getenv("RATE_LIMIT_MAX_REQUESTS")) if os.getenv("RATE_LIMIT_MAX_REQUESTS") else None,
@@ -104,6 +118,18 @@ def deep_merge_with_env_fallback(base: Dict[str, Any], fallback: Dict[str, Any])
     
     return result
 
+# Settings that config.json and the environment may change from their defaults
+TUNABLE_SETTINGS = {
+    "features": ("import_warmup",),
+    "performance": (
+        "update_queue_size", "webhook_workers", "loop_stall_threshold",
+        "http_pool_size", "http_keepalive", "upload_timeout",
+        "rate_limit_global", "rate_limit_chat", "rate_limit_group_per_minute",
+        "broadcast_concurrency", "download_workers", "heavy_workers",
+        "search_cache_ttl",
+    ),
+}
+
 def apply_defaults(config: Dict[str, Any]) -> Dict[str, Any]:
     """Apply default values for any remaining None values"""
     defaults = {
@@ -119,7 +145,8 @@ def apply_defaults(config: Dict[str, Any]) -> Dict[str, Any]:
             "user_tracking": True,
             "broadcast_system": True,
             "admin_management": True,
-            "hot_reload": True
+            "hot_reload": True,
+            "import_warmup": True
         },
         "apis": {
             "github_repo": "GrandpaEJ/KOMIHUB"
@@ -138,6 +165,19 @@ def apply_defaults(config: Dict[str, Any]) -> Dict[str, Any]:
         "performance": {
             "max_workers": 4,
             "timeout": 30,
+            "update_queue_size": 1000,
+            "webhook_workers": 1,
+            "loop_stall_threshold": 0.5,
+            "http_pool_size": 100,
+            "http_keepalive": 60,
+            "upload_timeout": 300,
+            "rate_limit_global": 30,
+            "rate_limit_chat": 1,
+            "rate_limit_group_per_minute": 20,
+            "broadcast_concurrency": 25,
+            "download_workers": 2,
+            "heavy_workers": 4,
+            "search_cache_ttl": 3600,
             "rate_limit": {
                 "enabled": True,
                 "max_requests": 100,
@@ -155,7 +195,16 @@ def apply_defaults(config: Dict[str, Any]) -> Dict[str, Any]:
         }
     }
     
-    return deep_merge_with_env_fallback(defaults, config)
+    merged = deep_merge_with_env_fallback(defaults, config)
+
+    # Tuning settings are read from config.json and the environment over the defaults
+    for section, keys in TUNABLE_SETTINGS.items():
+        for key in keys:
+            value = config.get(section, {}).get(key)
+            if value is not None:
+                merged[section][key] = value
+
+    return merged
 
 def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
     """Deep merge two dictionaries"""
@@ -212,6 +261,19 @@ LOG_TO_CONSOLE = config_data["logging"]["console_logging"]
 
 MAX_WORKERS = config_data["performance"]["max_workers"]
 TIMEOUT = config_data["performance"]["timeout"]
+UPDATE_QUEUE_SIZE = config_data["performance"]["update_queue_size"]
+WEBHOOK_WORKERS = config_data["performance"]["webhook_workers"]
+LOOP_STALL_THRESHOLD = config_data["performance"]["loop_stall_threshold"]
+HTTP_POOL_SIZE = config_data["performance"]["http_pool_size"]
+HTTP_KEEPALIVE = config_data["performance"]["http_keepalive"]
+UPLOAD_TIMEOUT = config_data["performance"]["upload_timeout"]
+RATE_LIMIT_GLOBAL = config_data["performance"]["rate_limit_global"]
+RATE_LIMIT_CHAT = config_data["performance"]["rate_limit_chat"]
+RATE_LIMIT_GROUP_PER_MINUTE = config_data["performance"]["rate_limit_group_per_minute"]
+BROADCAST_CONCURRENCY = config_data["performance"]["broadcast_concurrency"]
+DOWNLOAD_WORKERS = config_data["performance"]["download_workers"]
+HEAVY_WORKERS = config_data["performance"]["heavy_workers"]
+SEARCH_CACHE_TTL = config_data["performance"]["search_cache_ttl"]
 
 # Rate limiting config
 RATE_LIMIT_ENABLED = config_data["performance"]["rate_limit"]["enabled"]
@@ -226,6 +288,7 @@ USER_TRACKING = config_data["features"]["user_tracking"]
 BROADCAST_SYSTEM = config_data["features"]["broadcast_system"]
 ADMIN_MANAGEMENT = config_data["features"]["admin_management"]
 HOT_RELOAD = config_data["features"]["hot_reload"]
+IMPORT_WARMUP = config_data["features"]["import_warmup"]
 
 # API keys
 YOUTUBE_API_KEY = config_data["apis"]["yt_api_key"]
@@ -243,10 +306,13 @@ def get_config() -> Dict[str, Any]:
 def reload_config():
     """Reload configuration from files and environment"""
     global config, config_data, BOT_TOKEN, BOT_NAME, ADMIN_ID, ADMIN_NAME, DATABASE_URL, DATA_DIR
-    global LOG_LEVEL, LOG_TO_FILE, LOG_TO_CONSOLE, MAX_WORKERS, TIMEOUT
+    global LOG_LEVEL, LOG_TO_FILE, LOG_TO_CONSOLE, MAX_WORKERS, TIMEOUT, UPDATE_QUEUE_SIZE
+    global WEBHOOK_WORKERS, LOOP_STALL_THRESHOLD, HTTP_POOL_SIZE, HTTP_KEEPALIVE, UPLOAD_TIMEOUT
+    global RATE_LIMIT_GLOBAL, RATE_LIMIT_CHAT, RATE_LIMIT_GROUP_PER_MINUTE, BROADCAST_CONCURRENCY
+    global DOWNLOAD_WORKERS, HEAVY_WORKERS, SEARCH_CACHE_TTL
     global RATE_LIMIT_ENABLED, RATE_LIMIT_MAX_REQUESTS, RATE_LIMIT_WINDOW
     global AUTO_UPDATE, UPDATE_CHECK_INTERVAL, MAINTENANCE_MODE, USER_TRACKING
-    global BROADCAST_SYSTEM, ADMIN_MANAGEMENT, HOT_RELOAD, YOUTUBE_API_KEY
+    global BROADCAST_SYSTEM, ADMIN_MANAGEMENT, HOT_RELOAD, IMPORT_WARMUP, YOUTUBE_API_KEY
     global VERSION_URL, GITHUB_REPO, SFW_IMG_SPOILER, NSFW_IMG_SPOILER
     
     config_data = load_config()
@@ -267,6 +333,19 @@ def reload_config():
     
     MAX_WORKERS = config_data["performance"]["max_workers"]
     TIMEOUT = config_data["performance"]["timeout"]
+    UPDATE_QUEUE_SIZE = config_data["performance"]["update_queue_size"]
+    WEBHOOK_WORKERS = config_data["performance"]["webhook_workers"]
+    LOOP_STALL_THRESHOLD = config_data["performance"]["loop_stall_threshold"]
+    HTTP_POOL_SIZE = config_data["performance"]["http_pool_size"]
+    HTTP_KEEPALIVE = config_data["performance"]["http_keepalive"]
+    UPLOAD_TIMEOUT = config_data["performance"]["upload_timeout"]
+    RATE_LIMIT_GLOBAL = config_data["performance"]["rate_limit_global"]
+    RATE_LIMIT_CHAT = config_data["performance"]["rate_limit_chat"]
+    RATE_LIMIT_GROUP_PER_MINUTE = config_data["performance"]["rate_limit_group_per_minute"]
+    BROADCAST_CONCURRENCY = config_data["performance"]["broadcast_concurrency"]
+    DOWNLOAD_WORKERS = config_data["performance"]["download_workers"]
+    HEAVY_WORKERS = config_data["performance"]["heavy_workers"]
+    SEARCH_CACHE_TTL = config_data["performance"]["search_cache_ttl"]
     
     RATE_LIMIT_ENABLED = config_data["performance"]["rate_limit"]["enabled"]
     RATE_LIMIT_MAX_REQUESTS = config_data["performance"]["rate_limit"]["max_requests"]
@@ -279,6 +358,7 @@ def reload_config():
     BROADCAST_SYSTEM = config_data["features"]["broadcast_system"]
     ADMIN_MANAGEMENT = config_data["features"]["admin_management"]
     HOT_RELOAD = config_data["features"]["hot_reload"]
+    IMPORT_WARMUP = config_data["features"]["import_warmup"]
     
     YOUTUBE_API_KEY = config_data["apis"]["yt_api_key"]
     VERSION_URL = config_data["apis"]["version_url"]
@@ -10,6 +10,7 @@ from .logging import logger
 from .lang import get_lang
 from .handler import commands as cmd_handler
 from .handler import message as msg_handler
+from .permissions import CommandMeta
 
 # Import config and expose it for backward compatibility
 try:
@@ -39,12 +40,41 @@ dp = Dispatcher()
 commands = {}
 
 
-def command(cmd_name=None):
+def command(
+    cmd_name=None,
+    *,
+    role=None,
+    chat_types=None,
+    cost="normal",
+    cooldown=0,
+    inline_reply=False,
+):
+    """Register a command handler.
+
+    The keyword arguments declare metadata that the router enforces before
+    the handler runs: the role required to use the command ("owner",
+    "admin", "elder", "gc_admin" or "ch_admin"), the chat types it is allowed
+    in, its cost class and a per-user cooldown in seconds. "light" and
+    "normal" commands run on the update workers in chat order; "heavy"
+    ones (downloads, image generation) run in the bot's heavy task pool,
+    limited to HEAVY_WORKERS at a time, so they never hold an update
+    worker. inline_reply lets the first reply be sent in the webhook
+    response; only use it when the handler ignores the returned message.
+    """
+    meta = CommandMeta(
+        role=role,
+        chat_types=chat_types,
+        cost=cost,
+        cooldown=cooldown,
+        inline_reply=inline_reply,
+    )
+
     def decorator(func):
         name = cmd_name or func.__name__
         commands[name] = func
         # Store command name for later registration
         func._command_name = name
+        func._command_meta = meta
         return func
 
     return decorator
@@ -56,6 +86,7 @@ __all__ = [
     "Dispatcher",
     "Message",
     "command",
+    "CommandMeta",
     "logger",
     "get_lang",
     "config",
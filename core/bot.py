@@ -1,26 +1,292 @@
 import asyncio
 import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
 from aiogram import Bot, Dispatcher
 from aiogram.types import Message, Update
 from aiogram.filters import Command
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.dispatcher.event.handler import CallableObject
 from .logging import logger
 from .lang import get_lang
 from .database import db
+from .downloads import download_service
+from .youtube import youtube_search
+from .broadcast import broadcaster
 from .middleware import UserMiddleware
+from .hot_reload import hot_reloader
+from .http_session import TelegramSession
+from .ratelimit import rate_limiter
+from .lazy_import import warm_up_lazy_modules
+from .loop_monitor import loop_monitor
+from .metrics import metrics
+from .permissions import command_guard
+from .webhook_reply import webhook_replies
 import config
 
+# Workflow data flag marking updates fed by the scheduler's workers
+SCHEDULED = "scheduled"
+
+
+def update_chat_key(update: Update) -> Hashable:
+    """Get the conversation an update belongs to (chat id, else user id)"""
+    try:
+        event = update.event
+    except Exception:
+        return update.update_id
+
+    chat = getattr(event, "chat", None)
+    if chat is None and getattr(event, "message", None) is not None:
+        # Callback queries carry the chat on the message they belong to
+        chat = getattr(event.message, "chat", None)
+    if chat is not None:
+        return chat.id
+
+    user = getattr(event, "from_user", None)
+    return user.id if user else update.update_id
+
+
+class UpdateScheduler:
+    """Process updates in order per chat and in parallel across chats
+
+    Every chat gets its own FIFO. A chat with pending updates is handed to at
+    most one worker at a time, so replies inside a conversation never get
+    reordered, while up to `workers` different chats are processed
+    concurrently. After each update the chat goes to the back of the ready
+    queue, so one busy chat cannot starve the others. The total number of
+    pending updates is capped at max_pending.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 1000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending: Dict[Hashable, Deque[Update]] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._tasks: List[asyncio.Task] = []
+        self._process: Optional[Callable[[Update], Awaitable]] = None
+        self._size = 0
+        self.last_processed_at: Optional[float] = None
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def depth(self) -> int:
+        return self._size
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Backpressure counters for health checks and metrics"""
+        idle = None
+        if self.last_processed_at is not None:
+            idle = round(time.monotonic() - self.last_processed_at, 1)
+        return {
+            "depth": self._size,
+            "max_depth": self.max_pending,
+            "active_chats": len(self._pending),
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "seconds_since_last_update": idle,
+        }
+
+    def start(self, process: Callable[[Update], Awaitable]):
+        """Start the worker pool (must be called from the running event loop)"""
+        if self.running:
+            return
+        self._process = process
+        self._ready = asyncio.Queue()
+        self._space = asyncio.Condition()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"update-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(
+            f"Update scheduler started with {self.workers} workers, "
+            f"max {self.max_pending} pending updates"
+        )
+
+    def submit(self, update: Update) -> bool:
+        """Enqueue an update without waiting; False if the scheduler is full"""
+        if not self.running:
+            raise RuntimeError("Update scheduler is not running")
+        if self._size >= self.max_pending:
+            self.dropped += 1
+            logger.warning(
+                f"Update scheduler full ({self.max_pending}), rejecting update {update.update_id}"
+            )
+            return False
+        self._enqueue(update)
+        return True
+
+    async def put(self, update: Update):
+        """Enqueue an update, waiting for room if the scheduler is full"""
+        if not self.running:
+            raise RuntimeError("Update scheduler is not running")
+        async with self._space:
+            await self._space.wait_for(lambda: self._size < self.max_pending)
+            self._enqueue(update)
+
+    def _enqueue(self, update: Update):
+        key = update_chat_key(update)
+        self._size += 1
+        if key in self._pending:
+            # The chat is already queued or being processed by a worker
+            self._pending[key].append(update)
+        else:
+            self._pending[key] = deque((update,))
+            self._ready.put_nowait(key)
+
+    async def _worker(self):
+        while True:
+            key = await self._ready.get()
+            chat_updates = self._pending[key]
+            update = chat_updates.popleft()
+            try:
+                await self._process(update)
+                self.processed += 1
+                self.last_processed_at = time.monotonic()
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error processing scheduled update {update.update_id}: {e}")
+            finally:
+                if chat_updates:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._pending[key]
+                self._size -= 1
+                async with self._space:
+                    self._space.notify_all()
+
+    async def stop(self, timeout: float = 10.0):
+        """Let pending updates finish for up to timeout seconds, then stop workers"""
+        if not self.running:
+            return
+        try:
+            async with self._space:
+                await asyncio.wait_for(
+                    self._space.wait_for(lambda: self._size == 0), timeout
+                )
+        except asyncio.TimeoutError:
+            logger.warning(f"Update scheduler stopped with {self._size} updates pending")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+class HeavyTaskPool:
+    """Run long handlers outside the scheduler's worker lanes
+
+    Downloads and image generation can take minutes. Run on a scheduler
+    worker, a few of them would hold every lane and stall all other chats,
+    so such handlers are handed to this pool and the lane is freed at once.
+    At most `workers` run at the same time and up to max_pending more wait
+    for a slot; beyond that submit() refuses the job. Updates the chat
+    sends afterwards are processed while the job runs.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 100):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: set = set()
+        self.active = 0
+        self.rejected = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Running and queued heavy jobs, for health checks"""
+        return {
+            "workers": self.workers,
+            "active": self.active,
+            "waiting": len(self._tasks) - self.active,
+            "rejected": self.rejected,
+        }
+
+    def submit(self, name: str, job: Callable[[], Awaitable]) -> bool:
+        """Start job() in the background; False if too many jobs are queued"""
+        if len(self._tasks) >= self.workers + self.max_pending:
+            self.rejected += 1
+            logger.warning(f"Heavy task pool full, rejecting {name}")
+            return False
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        task = asyncio.create_task(self._run(name, job), name=f"heavy:{name}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, name: str, job: Callable[[], Awaitable]):
+        async with self._slots:
+            self.active += 1
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"Error in heavy task {name}: {e}")
+            finally:
+                self.active -= 1
+
+    async def stop(self, timeout: float = 10.0):
+        """Let running jobs finish for up to timeout seconds, then cancel the rest"""
+        if not self._tasks:
+            return
+        tasks = list(self._tasks)
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logger.warning(f"Cancelling {len(pending)} unfinished heavy tasks")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
 
 class KomihubBot:
     def __init__(self):
-        self.bot = Bot(token=config.BOT_TOKEN)
+        self.bot = Bot(
+            token=config.BOT_TOKEN,
+            session=TelegramSession(
+                timeout=config.TIMEOUT,
+                pool_size=config.HTTP_POOL_SIZE,
+                keepalive_timeout=config.HTTP_KEEPALIVE,
+                upload_timeout=config.UPLOAD_TIMEOUT,
+            ),
+        )
         self.dp = Dispatcher()
         self.lang = get_lang()
         self.webhook_url = os.getenv("WEBHOOK_URL")
+        # Telegram echoes this in X-Telegram-Bot-Api-Secret-Token on every webhook call
+        self.webhook_secret = os.getenv("WEBHOOK_SECRET") or None
         self.hosting_mode = os.getenv("HOSTING_MODE", "auto")
         self.webhook_setup_done = False
+        # Bot user returned by get_bot_info()
+        self._me = None
+
+        # Stable dispatcher routes; reloading a module only swaps their targets
+        self._command_routes = {}
+        self._event_routes = {}
+
+        # Per-chat ordered, cross-chat parallel update processing
+        self.scheduler = UpdateScheduler(
+            workers=config.MAX_WORKERS, max_pending=config.UPDATE_QUEUE_SIZE
+        )
+        # Long handlers run here instead of holding a scheduler worker
+        self.heavy_tasks = HeavyTaskPool(workers=config.HEAVY_WORKERS)
 
         # Register middleware
+        self.dp.update.outer_middleware(self._schedule_update)
         self.dp.message.middleware.register(UserMiddleware())
+        self.bot.session.middleware(webhook_replies.middleware)
+        self.bot.session.middleware(rate_limiter.middleware)
+        self.bot.session.middleware(metrics.api_middleware)
+        metrics.track_queue_depth(lambda: self.scheduler.depth)
 
     async def start_polling(self):
         # Register unknown command handler
@@ -31,13 +297,54 @@ class KomihubBot:
             bot_name=config.BOT_NAME, online_since=asyncio.get_event_loop().time()
         )
 
+        # Opens the first pooled API connection and caches the bot identity
+        await self.get_bot_info()
+        self.start_background_services()
+
         logger.info(self.lang.log_bot_started)
-        await self.dp.start_polling(self.bot)
+        try:
+            # The polling loop only hands updates to the scheduler, waiting
+            # when it is full, so getUpdates slows down under load
+            await self.dp.start_polling(self.bot, handle_as_tasks=False)
+        finally:
+            await self.scheduler.stop()
+            await self.heavy_tasks.stop()
+            download_service.shutdown()
+            await youtube_search.close()
+
+    def start_background_services(self, resume_broadcasts: bool = True):
+        """Start background work once the bot is online (polling or webhook)
+
+        Only one process may resume interrupted broadcasts, so webhook shards
+        other than the first pass resume_broadcasts=False.
+        """
+        self.scheduler.start(self.process_update)
+        loop_monitor.start()
+
+        if resume_broadcasts:
+            broadcaster.resume_pending(self.bot)
+
+        if config.HOT_RELOAD:
+            hot_reloader.start()
+
+        if config.IMPORT_WARMUP:
+            warm_up_lazy_modules()
+
+    async def _schedule_update(
+        self, handler: Callable, update: Update, data: Dict[str, Any]
+    ) -> Any:
+        """Outer update middleware routing polled updates through the scheduler"""
+        if data.get(SCHEDULED):
+            return await handler(update, data)
+        metrics.updates_received.labels("polling").inc()
+        await self.scheduler.put(update)
+        return None
 
     async def process_update(self, update: Update):
-        """Process a single update (for webhook mode)"""
+        """Process a single update right away (called by the scheduler workers)"""
         try:
-            await self.dp.feed_update(self.bot, update)
+            with webhook_replies.slot(update.update_id):
+                await self.dp.feed_update(self.bot, update, **{SCHEDULED: True})
         except Exception as e:
             logger.error(f"Error processing update {getattr(update, 'update_id', 'unknown')}: {e}")
 
@@ -49,8 +356,11 @@ class KomihubBot:
 
         try:
             webhook_info = await self.bot.get_webhook_info()
-            if webhook_info.url != self.webhook_url:
-                await self.bot.set_webhook(self.webhook_url)
+            # The current secret cannot be read back, so always re-set when one is used
+            if webhook_info.url != self.webhook_url or self.webhook_secret:
+                await self.bot.set_webhook(
+                    self.webhook_url, secret_token=self.webhook_secret
+                )
                 logger.info(f"Webhook set to: {self.webhook_url}")
             else:
                 logger.info("Webhook already configured correctly")
@@ -69,29 +379,128 @@ class KomihubBot:
             logger.error(f"Failed to delete webhook: {e}")
             return False
 
+    @property
+    def me(self):
+        """Bot identity cached by get_bot_info(), or None before it succeeded"""
+        return self._me
+
     async def get_bot_info(self):
-        """Get bot information"""
+        """Get bot information (requested from Telegram once, then cached)"""
+        if self._me is not None:
+            return self._me
         try:
-            return await self.bot.get_me()
+            self._me = await self.bot.me()
         except Exception as e:
             logger.error(f"Failed to get bot info: {e}")
-            return None
+        return self._me
+
+    def _make_route(self, routes, key, guard=None, timed=False):
+        """Create a dispatcher handler that calls the current target of a route"""
+
+        async def route(event, **kwargs):
+            target = routes.get(key)
+            if target is None:
+                # Handler was removed by a reload, let the next one try
+                raise SkipHandler()
+            if guard is not None and not await guard(key, target.callback, event):
+                return None
+
+            async def call():
+                if not timed:
+                    return await target.call(event, **kwargs)
+
+                in_flight = metrics.commands_in_flight.labels(key)
+                in_flight.inc()
+                started = time.perf_counter()
+                try:
+                    return await target.call(event, **kwargs)
+                except Exception:
+                    metrics.command_errors.labels(key).inc()
+                    raise
+                finally:
+                    in_flight.dec()
+                    metrics.command_duration.labels(key).observe(
+                        time.perf_counter() - started
+                    )
+
+            meta = getattr(target.callback, "_command_meta", None)
+            if meta is not None and meta.cost == "heavy":
+                # Free the update worker; the pool bounds heavy commands
+                if not self.heavy_tasks.submit(str(key), call):
+                    await event.answer(f"⏳ {self.lang.heavy_tasks_busy}")
+                return None
+            return await call()
+
+        route.__name__ = route.__qualname__ = f"route:{key}"
+        return route
 
     def register_command(self, command_name, handler):
         try:
-            self.dp.message.register(handler, Command(command_name))
+            if command_name in self._command_routes:
+                self._command_routes[command_name] = CallableObject(handler)
+                logger.debug(f"Swapped handler for command: {command_name}")
+                return
+            self._command_routes[command_name] = CallableObject(handler)
+            self.dp.message.register(
+                self._make_route(
+                    self._command_routes,
+                    command_name,
+                    guard=command_guard.check,
+                    timed=True,
+                ),
+                Command(command_name),
+            )
             logger.debug(f"Successfully registered command: {command_name}")
         except Exception as e:
             logger.error(f"Failed to register command {command_name}: {e}")
             raise
 
+    def unregister_command(self, command_name):
+        """Detach a command handler; its dispatcher route is skipped afterwards"""
+        if self._command_routes.get(command_name) is not None:
+            self._command_routes[command_name] = None
+            logger.debug(f"Unregistered command: {command_name}")
+
+    def get_command_handler(self, command_name):
+        """Get the handler currently serving a command, if any"""
+        target = self._command_routes.get(command_name)
+        return target.callback if target else None
+
     def register_event(self, event_type, handler):
-        if event_type == "chat_member":
-            self.dp.chat_member.register(handler)
-        elif event_type == "message":
+        observers = {
+            "chat_member": self.dp.chat_member,
+            "my_chat_member": self.dp.my_chat_member,
             # Register message handler without command filter to catch all messages
-            self.dp.message.register(handler)
+            "message": self.dp.message,
+        }
         # Add more event types as needed
+        if event_type not in observers:
+            return
+
+        key = (event_type, handler.__module__, handler.__qualname__)
+        if key in self._event_routes:
+            self._event_routes[key] = CallableObject(handler)
+            logger.debug(f"Swapped event handler: {key}")
+            return
+        self._event_routes[key] = CallableObject(handler)
+        observers[event_type].register(self._make_route(self._event_routes, key))
+
+    def unregister_stale_events(self, module_name, module=None):
+        """Detach event handlers of a module that its current code no longer registers
+
+        Pass no module to detach every event handler of a removed module.
+        """
+        removed = 0
+        for key, target in list(self._event_routes.items()):
+            if target is None or key[1] != module_name:
+                continue
+            current = module
+            for attr in key[2].split("."):
+                current = getattr(current, attr, None)
+            if current is not target.callback:
+                self._event_routes[key] = None
+                removed += 1
+        return removed
 
     async def handle_unknown_command(self, message: Message):
         """Handle unknown commands"""
@@ -0,0 +1,469 @@
+"""Resumable broadcast jobs sent by a pool of concurrent senders"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from .database import db
+from .logging import logger
+import config
+
+RUNNING = "running"
+PAUSED = "paused"
+CANCELLED = "cancelled"
+DONE = "done"
+
+# Bad request errors meaning the recipient no longer exists
+UNREACHABLE_ERRORS = ("chat not found", "user not found", "user is deactivated")
+
+# Units accepted by the "active:" filter, in days
+ACTIVE_UNITS = {"d": 1, "h": 1 / 24, "w": 7}
+
+# Chat registry types selected by the "chat:" filter
+CHAT_TYPES = {"group": ["group", "supergroup"], "channel": ["channel"]}
+
+# Seconds between progress checkpoints in storage and status message edits
+CHECKPOINT_INTERVAL = 2.0
+STATUS_INTERVAL = 5.0
+
+# Seconds without a checkpoint after which a job's runner is presumed dead
+OWNER_TIMEOUT = 60.0
+
+HOSTNAME = socket.gethostname()
+
+
+def parse_target(text: str) -> Tuple[Dict[str, Any], str]:
+    """Split leading targeting filters off a broadcast command's text
+
+    Filters are key:value words before the message, combined with AND:
+    role:admin (comma-separated roles), active:7d (seen within 7 days; h, d
+    or w), lang:en (language codes) and chat:private (users with a private
+    chat). chat:group and chat:channel (or chat:group,channel) target chats
+    from the chat registry instead of users and combine with active: only.
+    Returns the target and the remaining text. Raises ValueError for an
+    unknown or conflicting filter.
+    """
+    target: Dict[str, Any] = {}
+    words = text.split(" ")
+    while words and ":" in words[0]:
+        key, _, value = words[0].partition(":")
+        if key == "role":
+            target["roles"] = value.split(",")
+        elif key == "lang":
+            target["languages"] = value.lower().split(",")
+        elif key == "active":
+            unit = value[-1:].lower()
+            number = value[:-1] if unit in ACTIVE_UNITS else value
+            try:
+                target["active_days"] = float(number) * ACTIVE_UNITS.get(unit, 1)
+            except ValueError:
+                raise ValueError(f"Invalid activity window: {value}")
+        elif key == "chat":
+            kinds = value.lower().split(",")
+            if kinds == ["private"]:
+                target["private_only"] = True
+            elif all(kind in CHAT_TYPES for kind in kinds):
+                target["chat_types"] = [t for kind in kinds for t in CHAT_TYPES[kind]]
+            else:
+                raise ValueError(f"Unknown chat filter: {value}")
+        else:
+            break
+        words.pop(0)
+
+    if target.get("chat_types") and set(target) - {"chat_types", "active_days"}:
+        raise ValueError("Group and channel broadcasts only combine with active:")
+    return target, " ".join(words).strip()
+
+
+def describe_target(target: Dict[str, Any]) -> str:
+    """Human-readable summary of a job's targeting filters"""
+    if not target:
+        return "all users"
+    parts = []
+    if target.get("chat_types"):
+        parts.append("chats of type " + "/".join(target["chat_types"]))
+    if target.get("roles"):
+        parts.append("role " + "/".join(target["roles"]))
+    if target.get("active_days"):
+        parts.append(f"active in the last {target['active_days']:g} days")
+    if target.get("languages"):
+        parts.append("language " + "/".join(target["languages"]))
+    if target.get("private_only"):
+        parts.append("private chats")
+    return ", ".join(parts)
+
+
+class Broadcaster:
+    """Run broadcast jobs and keep their progress in broadcasts.json
+
+    Recipients are sent to in chat ID order by `concurrency` senders; the
+    bot's rate limiter paces the actual calls. Each checkpoint stores the
+    lowest chat ID that may not have been sent yet, so after a restart a
+    running job resumes from there and at most the messages that were in
+    flight are sent twice. Pause and cancel requests are written to storage
+    too, which lets any worker process control a job.
+
+    The process running a job records itself as the job's owner (pid and
+    host) and refreshes heartbeat_at at each checkpoint. A runner is only
+    started for a job without a live owner, checked in the same transaction
+    that claims it, so two shards never send the same job.
+
+    Users who blocked the bot or no longer exist are flagged unreachable at
+    each checkpoint and skipped by later broadcasts until they write again;
+    groups and channels the bot can no longer post in are flagged in the
+    chat registry. Jobs may carry a target (see parse_target), resolved
+    against the database's cached user index or the chat registry rather
+    than a scan of users.json.
+    """
+
+    def __init__(self, concurrency: int = 25):
+        self.concurrency = concurrency
+        # Jobs with a runner in this process, by ID
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return db.load_data("broadcasts").get(job_id)
+
+    def list_jobs(self, states=(RUNNING, PAUSED)) -> List[Dict[str, Any]]:
+        """Stored jobs in the given states, oldest first"""
+        jobs = [job for job in db.load_data("broadcasts").values() if job["state"] in states]
+        return sorted(jobs, key=lambda job: job["created_at"])
+
+    def _save_job(self, job: Dict[str, Any]):
+        with db.transaction("broadcasts"):
+            jobs = db.load_data("broadcasts")
+            jobs[job["id"]] = job
+            db.save_data("broadcasts", jobs)
+
+    @staticmethod
+    def _claim(job: Dict[str, Any]):
+        """Record this process as the job's runner"""
+        job["owner_pid"] = os.getpid()
+        job["owner_host"] = HOSTNAME
+        job["heartbeat_at"] = time.time()
+
+    @staticmethod
+    def _release(job: Dict[str, Any]):
+        job["owner_pid"] = job["owner_host"] = job["heartbeat_at"] = None
+
+    def _owner_alive(self, job: Dict[str, Any]) -> bool:
+        """Whether a stored job still has a runner in some process
+
+        On this host the owner's pid decides; runners on other hosts count
+        as alive until their heartbeat is OWNER_TIMEOUT seconds old.
+        """
+        if job["id"] in self._jobs:
+            return True
+        pid = job.get("owner_pid")
+        if pid is None:
+            return False
+        if job.get("owner_host") == HOSTNAME:
+            if pid == os.getpid():
+                # Left over from before a restart that reused this pid
+                return False
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return False
+            except PermissionError:
+                pass
+            return True
+        return time.time() - (job.get("heartbeat_at") or 0) <= OWNER_TIMEOUT
+
+    def _set_state(self, job_id: str, state: str) -> Optional[Dict[str, Any]]:
+        with db.transaction("broadcasts"):
+            jobs = db.load_data("broadcasts")
+            job = jobs.get(job_id)
+            if job is None or job["state"] in (CANCELLED, DONE):
+                return None
+            job["state"] = state
+            db.save_data("broadcasts", jobs)
+        # A runner in this process sees the change before its next checkpoint
+        local = self._jobs.get(job_id)
+        if local is not None:
+            local["state"] = state
+            return local
+        return job
+
+    async def start(
+        self,
+        bot: Bot,
+        text: Optional[str],
+        created_by: int,
+        status_chat_id: int,
+        status_message_id: int,
+        source: Optional[Dict[str, Any]] = None,
+        target: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Create a job for every targeted user and start sending
+
+        With a source ({"chat_id", "message_id", "forward"}) the job copies
+        or forwards that message instead of sending text, so media already
+        on Telegram's servers is never uploaded again.
+        """
+        job = {
+            "id": uuid.uuid4().hex[:8],
+            "text": text,
+            "source": source,
+            "target": target or {},
+            "created_by": created_by,
+            "created_at": time.time(),
+            "finished_at": None,
+            "state": RUNNING,
+            "total": len(self._recipients(target or {})),
+            "sent": 0,
+            "failed": 0,
+            "unreachable": 0,
+            # Every chat with a lower ID has been sent to (None: not started)
+            "next_chat_id": None,
+            "status_chat_id": status_chat_id,
+            "status_message_id": status_message_id,
+        }
+        self._claim(job)
+        self._save_job(job)
+        self._launch(bot, job)
+        logger.info(
+            f"Broadcast {job['id']} started for {job['total']} chats "
+            f"({describe_target(job['target'])})"
+        )
+        return job
+
+    def pause(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Pause a job; its senders stop after the messages in flight"""
+        return self._set_state(job_id, PAUSED)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Stop a job for good"""
+        return self._set_state(job_id, CANCELLED)
+
+    def resume(self, bot: Bot, job_id: str) -> Optional[Dict[str, Any]]:
+        """Continue a paused job, starting a runner here if none is left
+
+        A runner that is still stopping, in any process, picks the resume up
+        at its last checkpoint and carries on instead.
+        """
+        with db.transaction("broadcasts"):
+            jobs = db.load_data("broadcasts")
+            job = jobs.get(job_id)
+            if job is None or job["state"] != PAUSED:
+                return None
+            job["state"] = RUNNING
+            launch = not self._owner_alive(job)
+            if launch:
+                self._claim(job)
+            db.save_data("broadcasts", jobs)
+
+        local = self._jobs.get(job_id)
+        if local is not None:
+            local["state"] = RUNNING
+            return local
+        if launch:
+            self._launch(bot, job)
+        return job
+
+    def resume_pending(self, bot: Bot):
+        """Restart running jobs whose runner is gone, e.g. after a restart"""
+        for job_id in [job["id"] for job in self.list_jobs(states=(RUNNING,))]:
+            with db.transaction("broadcasts"):
+                jobs = db.load_data("broadcasts")
+                job = jobs.get(job_id)
+                if job is None or job["state"] != RUNNING or self._owner_alive(job):
+                    continue
+                self._claim(job)
+                db.save_data("broadcasts", jobs)
+            logger.info(f"Resuming broadcast {job_id} from chat {job['next_chat_id']}")
+            self._launch(bot, job)
+
+    def _launch(self, bot: Bot, job: Dict[str, Any]):
+        self._jobs[job["id"]] = job
+        task = asyncio.create_task(self._run(bot, job), name=f"broadcast-{job['id']}")
+        self._tasks[job["id"]] = task
+
+    def count_recipients(self, target: Dict[str, Any]) -> int:
+        """Number of chats a target currently selects"""
+        return len(self._recipients(target))
+
+    @staticmethod
+    def _recipients(target: Dict[str, Any]) -> set:
+        """Chat IDs a target selects: registry chats, or users' private chats"""
+        target = dict(target)
+        chat_types = target.pop("chat_types", None)
+        if chat_types:
+            return db.select_chats(chat_types, active_days=target.get("active_days"))
+        return db.select_users(**target)
+
+    async def _run(self, bot: Bot, job: Dict[str, Any]):
+        start = job.get("next_chat_id")
+        recipients = iter(
+            sorted(
+                chat_id
+                for chat_id in self._recipients(job.get("target", {}))
+                if start is None or chat_id >= start
+            )
+        )
+        chat_job = bool(job.get("target", {}).get("chat_types"))
+        # Recipients found unreachable since the last checkpoint, with the reason
+        unreachable: Dict[int, str] = {}
+        in_flight = set()
+        last_taken = None
+        exhausted = False
+        last_checkpoint = last_status = time.monotonic()
+
+        def checkpoint(release: bool = False, force: bool = False) -> bool:
+            """Store progress and refresh the heartbeat
+
+            With release, the job is given up unless it was resumed while the
+            senders were stopping (or always, with force). Returns whether
+            this runner still owns the job.
+            """
+            if unreachable:
+                if chat_job:
+                    db.mark_chats_unreachable(unreachable)
+                else:
+                    db.mark_unreachable(unreachable)
+                unreachable.clear()
+            if in_flight:
+                job["next_chat_id"] = min(in_flight)
+            elif last_taken is not None:
+                job["next_chat_id"] = last_taken + 1
+            with db.transaction("broadcasts"):
+                jobs = db.load_data("broadcasts")
+                stored = jobs.get(job["id"])
+                # Pick up pause, resume and cancel requests made by another process
+                if job["state"] != DONE and stored and stored["state"] in (RUNNING, PAUSED, CANCELLED):
+                    job["state"] = stored["state"]
+                keep = not release or (
+                    not force and job["state"] == RUNNING and not exhausted
+                )
+                if keep:
+                    self._claim(job)
+                else:
+                    self._release(job)
+                jobs[job["id"]] = job
+                db.save_data("broadcasts", jobs)
+            return keep
+
+        async def sender():
+            nonlocal last_taken, exhausted, last_checkpoint, last_status
+            while job["state"] == RUNNING:
+                chat_id = next(recipients, None)
+                if chat_id is None:
+                    exhausted = True
+                    return
+                last_taken = chat_id
+                in_flight.add(chat_id)
+                try:
+                    await self._send(bot, job, chat_id)
+                    job["sent"] += 1
+                except Exception as e:
+                    reason = self._unreachable_reason(e)
+                    if reason:
+                        unreachable[chat_id] = reason
+                        job["unreachable"] = job.get("unreachable", 0) + 1
+                    else:
+                        job["failed"] += 1
+                        logger.warning(f"Failed to send broadcast to chat {chat_id}: {e}")
+                finally:
+                    in_flight.discard(chat_id)
+
+                now = time.monotonic()
+                if now - last_checkpoint >= CHECKPOINT_INTERVAL:
+                    last_checkpoint = now
+                    checkpoint()
+                if now - last_status >= STATUS_INTERVAL:
+                    # Throttled, so one sender can wait for the edit inline
+                    last_status = now
+                    await self._show_status(bot, job)
+
+        owned = True
+        try:
+            # Loop again if the job was resumed while its senders were stopping
+            while owned:
+                while job["state"] == RUNNING and not exhausted:
+                    await asyncio.gather(*(sender() for _ in range(self.concurrency)))
+                if job["state"] == RUNNING:
+                    job["state"] = DONE
+                    job["finished_at"] = time.time()
+                owned = checkpoint(release=True)
+        finally:
+            if owned:
+                # Interrupted: store the progress and leave the job to be resumed
+                checkpoint(release=True, force=True)
+            self._jobs.pop(job["id"], None)
+            self._tasks.pop(job["id"], None)
+
+        await self._show_status(bot, job)
+        logger.info(
+            f"Broadcast {job['id']} {job['state']}: {job['sent']} sent, "
+            f"{job['failed']} failed, {job.get('unreachable', 0)} unreachable"
+        )
+
+    @staticmethod
+    def _unreachable_reason(error: Exception) -> Optional[str]:
+        """Why a failed send means the user cannot be messaged, if it does"""
+        if isinstance(error, TelegramForbiddenError):
+            return error.message
+        if isinstance(error, TelegramBadRequest) and any(
+            text in error.message.lower() for text in UNREACHABLE_ERRORS
+        ):
+            return error.message
+        return None
+
+    @staticmethod
+    async def _send(bot: Bot, job: Dict[str, Any], chat_id: int):
+        source = job.get("source")
+        if source is None:
+            await bot.send_message(
+                chat_id=chat_id,
+                text=f"📢 <b>Important Message from Admin:</b>\n\n{job['text']}",
+                parse_mode="HTML",
+            )
+        elif source.get("forward"):
+            await bot.forward_message(
+                chat_id=chat_id,
+                from_chat_id=source["chat_id"],
+                message_id=source["message_id"],
+            )
+        else:
+            await bot.copy_message(
+                chat_id=chat_id,
+                from_chat_id=source["chat_id"],
+                message_id=source["message_id"],
+            )
+
+    async def _show_status(self, bot: Bot, job: Dict[str, Any]):
+        """Edit the admin's status message with the job's progress"""
+        titles = {
+            RUNNING: "📢 <b>Broadcasting...</b>",
+            PAUSED: "⏸ <b>Broadcast paused</b>",
+            CANCELLED: "🛑 <b>Broadcast cancelled</b>",
+            DONE: "✅ <b>Broadcast Complete!</b>",
+        }
+        text = (
+            f"{titles[job['state']]}\n\n"
+            f"🆔 Job: <code>{job['id']}</code>\n"
+            f"✅ Sent: {job['sent']}\n"
+            f"❌ Failed: {job['failed']}\n"
+            f"🚫 Unreachable: {job.get('unreachable', 0)}\n"
+            f"📊 Progress: {job['sent'] + job['failed'] + job.get('unreachable', 0)}/{job['total']}"
+        )
+        try:
+            await bot.edit_message_text(
+                text=text,
+                chat_id=job["status_chat_id"],
+                message_id=job["status_message_id"],
+                parse_mode="HTML",
+            )
+        except Exception as e:
+            logger.debug(f"Could not update broadcast {job['id']} status: {e}")
+
+
+# Global broadcaster instance
+broadcaster = Broadcaster(concurrency=config.BROADCAST_CONCURRENCY)
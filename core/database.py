@@ -1,9 +1,28 @@
+import bisect
 import json
 import os
+import threading
 import time
 import importlib.util
+from contextlib import contextmanager
 from typing import Dict, List, Any, Optional
 from .logging import logger
+from .metrics import metrics
+from startup_profiler import profiler
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Whether writes can be serialized across processes (webhook shards)
+PROCESS_LOCKS = fcntl is not None
+
+# Seconds between activity writes for a known chat
+CHAT_ACTIVITY_INTERVAL = 300
+
+# Bot membership statuses in which it can still post to a chat
+CHAT_PRESENT_STATUSES = ("member", "administrator", "creator")
 
 
 class JSONDatabase:
@@ -19,6 +38,33 @@ class JSONDatabase:
             "bans": os.path.join(data_dir, "bans.json"),
             "disabled_commands": os.path.join(data_dir, "disabled_commands.json"),
             "command_stats": os.path.join(data_dir, "command_stats.json"),
+            "broadcasts": os.path.join(data_dir, "broadcasts.json"),
+            "chats": os.path.join(data_dir, "chats.json"),
+            "media_cache": os.path.join(data_dir, "media_cache.json"),
+        }
+
+        # Database name -> [thread lock, lock file, nesting depth]
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+        # Cached user ID -> admin types index, rebuilt when admins.json changes
+        self._role_index = None
+        self._role_index_mtime = None
+
+        # Chat ID -> time its last_active was last written, to batch activity
+        self._chat_touched = {}
+
+        # Cached lookup sets over users.json, rebuilt when the file changes
+        self._user_index = None
+        self._user_index_mtime = None
+
+        # Write counters for health checks; writes are synchronous, so there
+        # is never a pending backlog to report
+        self.flush_stats = {
+            "flushes": 0,
+            "failed": 0,
+            "last_flush_ms": None,
+            "last_flush_at": None,
         }
 
         # Initialize databases
@@ -75,6 +121,18 @@ class JSONDatabase:
         if not os.path.exists(self.files["command_stats"]):
             self.save_data("command_stats", {})
 
+        # Broadcast jobs
+        if not os.path.exists(self.files["broadcasts"]):
+            self.save_data("broadcasts", {})
+
+        # Groups and channels the bot belongs to
+        if not os.path.exists(self.files["chats"]):
+            self.save_data("chats", {})
+
+        # Telegram file_ids of uploaded media
+        if not os.path.exists(self.files["media_cache"]):
+            self.save_data("media_cache", {})
+
         # Initialize bot-specific data
         self._init_bot_data()
 
@@ -137,17 +195,12 @@ class JSONDatabase:
                         help_info = module.help()
                         command_name = help_info.get("name", filename[:-3])
 
-                        # Check if command requires admin
-                        admin_only = False
-                        if hasattr(module, "command"):
-                            # Check function content for admin checks
-                            import inspect
-
-                            source = inspect.getsource(module)
-                            admin_only = (
-                                "db.is_admin(message.from_user.id)" in source
-                                or "message.from_user.id != config.ADMIN_ID" in source
-                            )
+                        # Admin-only commands declare a required role
+                        admin_only = any(
+                            getattr(attr, "_command_meta", None) is not None
+                            and attr._command_meta.role is not None
+                            for attr in vars(module).values()
+                        )
 
                         commands_info[command_name] = {
                             "name": command_name,
@@ -206,6 +259,12 @@ class JSONDatabase:
             self.save_data("disabled_commands", [])
         elif db_name == "command_stats":
             self.save_data("command_stats", {})
+        elif db_name == "broadcasts":
+            self.save_data("broadcasts", {})
+        elif db_name == "chats":
+            self.save_data("chats", {})
+        elif db_name == "media_cache":
+            self.save_data("media_cache", {})
 
     def get_bot_info(self):
         """Get bot-specific information"""
@@ -229,6 +288,32 @@ class JSONDatabase:
             with open(bot_file, "w", encoding="utf-8") as f:
                 json.dump(bot_info, f, indent=2, ensure_ascii=False)
 
+    @contextmanager
+    def transaction(self, db_name: str):
+        """Hold a database's lock across a load, change and save
+
+        Webhook shards write the same files; without the lock two processes
+        that update a file at the same time each lose the other's change.
+        The lock is an flock on "<file>.lock", so it is also honoured by
+        other processes. Nested transactions on one database reuse it.
+        """
+        with self._locks_guard:
+            lock = self._locks.get(db_name)
+            if lock is None:
+                lock = self._locks[db_name] = [threading.RLock(), None, 0]
+        with lock[0]:
+            if lock[2] == 0 and fcntl is not None:
+                if lock[1] is None:
+                    lock[1] = open(f"{self.files[db_name]}.lock", "a")
+                fcntl.flock(lock[1], fcntl.LOCK_EX)
+            lock[2] += 1
+            try:
+                yield
+            finally:
+                lock[2] -= 1
+                if lock[2] == 0 and fcntl is not None:
+                    fcntl.flock(lock[1], fcntl.LOCK_UN)
+
     def load_data(self, db_name: str) -> Dict[str, Any]:
         """Load data from a database file"""
         try:
@@ -252,20 +337,35 @@ class JSONDatabase:
     def save_data(self, db_name: str, data: Dict[str, Any]) -> bool:
         """Save data to a database file"""
         try:
-            with open(self.files[db_name], "w", encoding="utf-8") as f:
+            # Write a temp file and swap it in, so readers (including other
+            # worker processes) never see a half-written file
+            started = time.perf_counter()
+            path = self.files[db_name]
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            duration = time.perf_counter() - started
+            metrics.storage_flush.labels(db_name).observe(duration)
+            self.flush_stats["flushes"] += 1
+            self.flush_stats["last_flush_ms"] = round(duration * 1000, 2)
+            self.flush_stats["last_flush_at"] = time.time()
+            if db_name == "admins":
+                self._role_index = None
             return True
         except Exception as e:
+            self.flush_stats["failed"] += 1
             logger.error(f"Error saving {db_name}: {e}")
             return False
 
     # Bot stats methods
     def update_bot_stats(self, **kwargs):
         """Update bot statistics"""
-        stats = self.load_data("bot_stats")
-        stats.update(kwargs)
-        stats["last_updated"] = time.time()
-        self.save_data("bot_stats", stats)
+        with self.transaction("bot_stats"):
+            stats = self.load_data("bot_stats")
+            stats.update(kwargs)
+            stats["last_updated"] = time.time()
+            self.save_data("bot_stats", stats)
 
     def get_bot_stats(self):
         """Get bot statistics"""
@@ -273,16 +373,27 @@ class JSONDatabase:
 
     # User management methods
     def add_user(self, user_id: int, user_data: Dict[str, Any]):
-        """Add or update user data"""
-        users = self.load_data("users")
-        users[str(user_id)] = {
-            "user_id": user_id,
-            "role": "user",  # Default role
-            "joined_at": time.time(),
-            "last_seen": time.time(),
-            **user_data,
-        }
-        self.save_data("users", users)
+        """Add or update user data
+
+        Existing records keep their role and join time. A user flagged
+        unreachable is reactivated only when user_data marks a private chat
+        (private_chat=True), since that is the chat broadcasts go to; group
+        messages and joins do not mean the bot can message them again.
+        """
+        with self.transaction("users"):
+            users = self.load_data("users")
+            previous = users.get(str(user_id))
+            user = dict(previous or {
+                "user_id": user_id,
+                "role": "user",  # Default role
+                "joined_at": time.time(),
+            })
+            user.update(user_data)
+            user["last_seen"] = time.time()
+            if user_data.get("private_chat") and user.pop("unreachable", None):
+                logger.info(f"User {user_id} is reachable again")
+            users[str(user_id)] = user
+            self._save_users(users, {user_id: previous})
 
     def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user data"""
@@ -291,12 +402,219 @@ class JSONDatabase:
 
     def update_user(self, user_id: int, **kwargs):
         """Update user data"""
-        users = self.load_data("users")
-        user_key = str(user_id)
-        if user_key in users:
-            users[user_key].update(kwargs)
-            users[user_key]["last_seen"] = time.time()
-            self.save_data("users", users)
+        with self.transaction("users"):
+            users = self.load_data("users")
+            user_key = str(user_id)
+            if user_key in users:
+                previous = users[user_key]
+                users[user_key] = {**previous, **kwargs, "last_seen": time.time()}
+                self._save_users(users, {user_id: previous})
+
+    def mark_unreachable(self, user_ids: Dict[int, str]):
+        """Flag users the bot can no longer message, with the reason for each"""
+        with self.transaction("users"):
+            users = self.load_data("users")
+            previous = {}
+            for user_id, reason in user_ids.items():
+                user = users.get(str(user_id))
+                if user is not None:
+                    previous[user_id] = user
+                    users[str(user_id)] = {
+                        **user,
+                        "unreachable": {"reason": reason, "at": time.time()},
+                    }
+            self._save_users(users, previous)
+
+    def _save_users(self, users: Dict[str, Any], previous: Dict[int, Optional[Dict[str, Any]]]):
+        """Save users.json and patch the cached index for the changed users
+
+        `previous` maps each changed user ID to its record before the
+        change. Call inside a users transaction. The index is patched in
+        place when it matched the file this write started from; if another
+        process wrote the file since, it is rebuilt on next use instead.
+        """
+        current = (
+            self._user_index is not None
+            and self._file_mtime("users") == self._user_index_mtime
+        )
+        if not self.save_data("users", users):
+            return
+        if not current:
+            self._user_index = None
+            return
+        for user_id, old in previous.items():
+            if old is not None:
+                self._unindex_user(self._user_index, user_id, old)
+            self._index_user(self._user_index, user_id, users[str(user_id)])
+        self._user_index_mtime = self._file_mtime("users")
+
+    def _file_mtime(self, db_name: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.files[db_name])
+        except OSError:
+            return None
+
+    @staticmethod
+    def _index_user(
+        index: Dict[str, Any], user_id: int, user: Dict[str, Any], keep_sorted: bool = True
+    ):
+        index["roles"].setdefault(user.get("role", "user"), set()).add(user_id)
+        if user.get("language_code"):
+            index["languages"].setdefault(user["language_code"], set()).add(user_id)
+        if user.get("private_chat"):
+            index["private"].add(user_id)
+        if user.get("unreachable"):
+            index["unreachable"].add(user_id)
+        entry = (user.get("last_seen") or 0, user_id)
+        if keep_sorted:
+            bisect.insort(index["last_seen"], entry)
+        else:
+            index["last_seen"].append(entry)
+
+    @staticmethod
+    def _unindex_user(index: Dict[str, Any], user_id: int, user: Dict[str, Any]):
+        index["roles"].get(user.get("role", "user"), set()).discard(user_id)
+        if user.get("language_code"):
+            index["languages"].get(user["language_code"], set()).discard(user_id)
+        index["private"].discard(user_id)
+        index["unreachable"].discard(user_id)
+        entry = (user.get("last_seen") or 0, user_id)
+        position = bisect.bisect_left(index["last_seen"], entry)
+        if position < len(index["last_seen"]) and index["last_seen"][position] == entry:
+            del index["last_seen"][position]
+
+    def get_user_index(self) -> Dict[str, Any]:
+        """Get cached user lookups for broadcast targeting
+
+        "roles" and "languages" map a value to a set of user IDs, "private"
+        and "unreachable" are sets of user IDs, and "last_seen" is a list of
+        (timestamp, user ID) pairs sorted by time.
+        """
+        mtime = self._file_mtime("users")
+        if self._user_index is None or mtime != self._user_index_mtime:
+            index = {
+                "roles": {},
+                "languages": {},
+                "private": set(),
+                "unreachable": set(),
+                "last_seen": [],
+            }
+            for key, user in self.load_data("users").items():
+                self._index_user(index, int(key), user, keep_sorted=False)
+            index["last_seen"].sort()
+            self._user_index = index
+            self._user_index_mtime = mtime
+        return self._user_index
+
+    def get_unreachable_users(self) -> set:
+        """Get the set of user IDs flagged unreachable"""
+        return set(self.get_user_index()["unreachable"])
+
+    def select_users(
+        self,
+        roles: List[str] = None,
+        active_days: float = None,
+        languages: List[str] = None,
+        private_only: bool = False,
+    ) -> set:
+        """Get reachable user IDs matching every given filter, from the index"""
+        index = self.get_user_index()
+        selected = None
+
+        def narrow(ids):
+            nonlocal selected
+            selected = set(ids) if selected is None else selected & ids
+
+        if roles:
+            narrow(set().union(*(index["roles"].get(role, set()) for role in roles)))
+        if languages:
+            narrow(
+                set().union(
+                    *(
+                        ids
+                        for code, ids in index["languages"].items()
+                        # "en" also matches regional codes such as "en-US"
+                        if any(code.split("-")[0] == lang for lang in languages)
+                    )
+                )
+            )
+        if private_only:
+            narrow(index["private"])
+        if active_days:
+            since = time.time() - active_days * 86400
+            start = bisect.bisect_left(index["last_seen"], (since, 0))
+            narrow({user_id for _, user_id in index["last_seen"][start:]})
+
+        if selected is None:
+            selected = {user_id for _, user_id in index["last_seen"]}
+        return selected - index["unreachable"]
+
+    # Chat registry methods
+    def update_chat(self, chat_id: int, **kwargs):
+        """Add or update a group or channel in the chat registry"""
+        with self.transaction("chats"):
+            chats = self.load_data("chats")
+            chat = chats.get(str(chat_id)) or {
+                "chat_id": chat_id,
+                "added_at": time.time(),
+                "member_count": None,
+            }
+            chat.update(kwargs)
+            chat["last_active"] = time.time()
+            chats[str(chat_id)] = chat
+            self._chat_touched[chat_id] = chat["last_active"]
+            self.save_data("chats", chats)
+
+    def touch_chat(self, chat_id: int, chat_type: str, title: str = None):
+        """Record activity in a group or channel
+
+        Called for every group message, so known chats are written at most
+        once per CHAT_ACTIVITY_INTERVAL seconds.
+        """
+        last = self._chat_touched.get(chat_id)
+        if last is not None and time.time() - last < CHAT_ACTIVITY_INTERVAL:
+            return
+        chat = self.get_chat(chat_id) or {}
+        updates = {"type": chat_type, "title": title}
+        if chat.get("status") not in CHAT_PRESENT_STATUSES:
+            # The bot just received a message there, so it is a member
+            updates["status"] = "member"
+        self.update_chat(chat_id, **updates)
+
+    def adjust_chat_members(self, chat_id: int, delta: int):
+        """Change a chat's known member count after a join or leave"""
+        with self.transaction("chats"):
+            chats = self.load_data("chats")
+            chat = chats.get(str(chat_id))
+            if chat and chat.get("member_count") is not None:
+                chat["member_count"] = max(0, chat["member_count"] + delta)
+                self.save_data("chats", chats)
+
+    def get_chat(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        """Get a chat from the registry"""
+        return self.load_data("chats").get(str(chat_id))
+
+    def select_chats(self, chat_types: List[str], active_days: float = None) -> set:
+        """Get IDs of chats of the given types the bot is still in"""
+        since = time.time() - active_days * 86400 if active_days else 0
+        return {
+            int(chat_id)
+            for chat_id, chat in self.load_data("chats").items()
+            if chat.get("type") in chat_types
+            and chat.get("status") in CHAT_PRESENT_STATUSES
+            and chat.get("last_active", 0) >= since
+        }
+
+    def mark_chats_unreachable(self, chat_ids: Dict[int, str]):
+        """Flag chats the bot can no longer post in, with the reason for each"""
+        with self.transaction("chats"):
+            chats = self.load_data("chats")
+            for chat_id, reason in chat_ids.items():
+                chat = chats.get(str(chat_id))
+                if chat is not None:
+                    chat["status"] = "unreachable"
+                    chat["unreachable_reason"] = reason
+            self.save_data("chats", chats)
 
     # Role management methods
     def get_user_role(self, user_id: int) -> str:
@@ -310,48 +628,49 @@ class JSONDatabase:
 
     def get_role_users(self, role: str) -> List[int]:
         """Get all users with a specific role"""
-        users = self.load_data("users")
-        return [int(uid) for uid, data in users.items() if data.get("role") == role]
+        return sorted(self.get_user_index()["roles"].get(role, ()))
 
     # Admin management methods
     def add_admin(self, user_id: int, admin_type: str = "admins"):
         """Add user to admin list"""
-        admins = self.load_data("admins")
-        if admin_type not in admins:
-            admins[admin_type] = []
-
-        # Check if user is already admin of this type
-        existing_admin = next((admin for admin in admins[admin_type] if admin.get("user_id") == user_id), None)
-        if not existing_admin:
-            admin_entry = {"user_id": user_id, "added_at": time.time()}
-            admins[admin_type].append(admin_entry)
-            self.save_data("admins", admins)
-            # Update user role
-            role_map = {
-                "owner": "owner",
-                "admins": "admin",
-                "elders": "elder",
-                "gc_admins": "gc_admin",
-                "ch_admins": "ch_admin",
-            }
-            self.set_user_role(user_id, role_map.get(admin_type, "user"))
-            return True
-        return False
+        with self.transaction("admins"):
+            admins = self.load_data("admins")
+            if admin_type not in admins:
+                admins[admin_type] = []
+
+            # Check if user is already admin of this type
+            existing_admin = next((admin for admin in admins[admin_type] if admin.get("user_id") == user_id), None)
+            if not existing_admin:
+                admin_entry = {"user_id": user_id, "added_at": time.time()}
+                admins[admin_type].append(admin_entry)
+                self.save_data("admins", admins)
+                # Update user role
+                role_map = {
+                    "owner": "owner",
+                    "admins": "admin",
+                    "elders": "elder",
+                    "gc_admins": "gc_admin",
+                    "ch_admins": "ch_admin",
+                }
+                self.set_user_role(user_id, role_map.get(admin_type, "user"))
+                return True
+            return False
 
     def remove_admin(self, user_id: int, admin_type: str = "admins"):
         """Remove user from admin list"""
-        admins = self.load_data("admins")
-        if admin_type in admins:
-            # Find and remove the admin entry
-            admin_list = admins[admin_type]
-            for i, admin_entry in enumerate(admin_list):
-                if admin_entry.get("user_id") == user_id:
-                    admin_list.pop(i)
-                    self.save_data("admins", admins)
-                    # Reset to user role if not in other admin lists
-                    self._update_user_role_from_admins(user_id)
-                    return True
-        return False
+        with self.transaction("admins"):
+            admins = self.load_data("admins")
+            if admin_type in admins:
+                # Find and remove the admin entry
+                admin_list = admins[admin_type]
+                for i, admin_entry in enumerate(admin_list):
+                    if admin_entry.get("user_id") == user_id:
+                        admin_list.pop(i)
+                        self.save_data("admins", admins)
+                        # Reset to user role if not in other admin lists
+                        self._update_user_role_from_admins(user_id)
+                        return True
+            return False
 
     def _update_user_role_from_admins(self, user_id: int):
         """Update user role based on admin status"""
@@ -377,47 +696,55 @@ class JSONDatabase:
         # Default to user if not in any admin list
         self.set_user_role(user_id, "user")
 
+    def get_role_index(self) -> Dict[int, set]:
+        """Get the cached mapping of user ID to the admin types they belong to"""
+        try:
+            mtime = os.path.getmtime(self.files["admins"])
+        except OSError:
+            mtime = None
+
+        if self._role_index is None or mtime != self._role_index_mtime:
+            index = {}
+            for admin_type, admin_list in self.load_data("admins").items():
+                for admin in admin_list:
+                    # Handle both old format (int) and new format (dict)
+                    uid = admin if isinstance(admin, int) else admin.get("user_id", 0)
+                    index.setdefault(uid, set()).add(admin_type)
+            self._role_index = index
+            self._role_index_mtime = mtime
+        return self._role_index
+
     def is_admin(self, user_id: int, admin_type: str = None) -> bool:
         """Check if user is admin"""
-        admins = self.load_data("admins")
-
+        admin_types = self.get_role_index().get(user_id)
+        if not admin_types:
+            return False
         if admin_type:
-            admin_list = admins.get(admin_type, [])
-            # Handle both old format (int) and new format (dict)
-            return any(
-                (admin if isinstance(admin, int) else admin.get("user_id", 0)) == user_id
-                for admin in admin_list
-            )
-
-        # Check all admin types
-        for admin_list in admins.values():
-            if any(
-                (admin if isinstance(admin, int) else admin.get("user_id", 0)) == user_id
-                for admin in admin_list
-            ):
-                return True
-        return False
+            return admin_type in admin_types
+        return True
 
     # Ban management methods
     def ban_user(self, user_id: int, reason: str = "", banned_by: int = None):
         """Ban a user"""
-        bans = self.load_data("bans")
-        bans[str(user_id)] = {
-            "user_id": user_id,
-            "banned_at": time.time(),
-            "reason": reason,
-            "banned_by": banned_by,
-        }
-        self.save_data("bans", bans)
+        with self.transaction("bans"):
+            bans = self.load_data("bans")
+            bans[str(user_id)] = {
+                "user_id": user_id,
+                "banned_at": time.time(),
+                "reason": reason,
+                "banned_by": banned_by,
+            }
+            self.save_data("bans", bans)
 
     def unban_user(self, user_id: int):
         """Unban a user"""
-        bans = self.load_data("bans")
-        if str(user_id) in bans:
-            del bans[str(user_id)]
-            self.save_data("bans", bans)
-            return True
-        return False
+        with self.transaction("bans"):
+            bans = self.load_data("bans")
+            if str(user_id) in bans:
+                del bans[str(user_id)]
+                self.save_data("bans", bans)
+                return True
+            return False
 
     def is_banned(self, user_id: int) -> bool:
         """Check if user is banned"""
@@ -432,23 +759,25 @@ class JSONDatabase:
     # Command management methods
     def disable_command(self, command_name: str):
         """Disable a command"""
-        disabled = self.load_data("disabled_commands")
-        if command_name not in disabled:
-            disabled.append(command_name)
-            self.save_data("disabled_commands", disabled)
-            self.update_bot_command_status(command_name, True)
-            return True
-        return False
+        with self.transaction("disabled_commands"):
+            disabled = self.load_data("disabled_commands")
+            if command_name not in disabled:
+                disabled.append(command_name)
+                self.save_data("disabled_commands", disabled)
+                self.update_bot_command_status(command_name, True)
+                return True
+            return False
 
     def enable_command(self, command_name: str):
         """Enable a command"""
-        disabled = self.load_data("disabled_commands")
-        if command_name in disabled:
-            disabled.remove(command_name)
-            self.save_data("disabled_commands", disabled)
-            self.update_bot_command_status(command_name, False)
-            return True
-        return False
+        with self.transaction("disabled_commands"):
+            disabled = self.load_data("disabled_commands")
+            if command_name in disabled:
+                disabled.remove(command_name)
+                self.save_data("disabled_commands", disabled)
+                self.update_bot_command_status(command_name, False)
+                return True
+            return False
 
     def is_command_disabled(self, command_name: str) -> bool:
         """Check if command is disabled"""
@@ -462,28 +791,29 @@ class JSONDatabase:
     # Command stats methods
     def increment_command_usage(self, command_name: str, user_id: int):
         """Increment command usage statistics"""
-        stats = self.load_data("command_stats")
-        cmd_key = command_name
-
-        if cmd_key not in stats:
-            stats[cmd_key] = {
-                "total_uses": 0,
-                "unique_users": 0,
-                "last_used": 0,
-                "users": {},
-            }
+        with self.transaction("command_stats"):
+            stats = self.load_data("command_stats")
+            cmd_key = command_name
+
+            if cmd_key not in stats:
+                stats[cmd_key] = {
+                    "total_uses": 0,
+                    "unique_users": 0,
+                    "last_used": 0,
+                    "users": {},
+                }
 
-        stats[cmd_key]["total_uses"] += 1
-        stats[cmd_key]["last_used"] = time.time()
+            stats[cmd_key]["total_uses"] += 1
+            stats[cmd_key]["last_used"] = time.time()
 
-        user_key = str(user_id)
-        if user_key not in stats[cmd_key]["users"]:
-            stats[cmd_key]["users"][user_key] = 0
-            stats[cmd_key]["unique_users"] += 1
+            user_key = str(user_id)
+            if user_key not in stats[cmd_key]["users"]:
+                stats[cmd_key]["users"][user_key] = 0
+                stats[cmd_key]["unique_users"] += 1
 
-        stats[cmd_key]["users"][user_key] += 1
+            stats[cmd_key]["users"][user_key] += 1
 
-        self.save_data("command_stats", stats)
+            self.save_data("command_stats", stats)
 
     def get_command_stats(self, command_name: str = None):
         """Get command usage statistics"""
@@ -494,4 +824,5 @@ class JSONDatabase:
 
 
 # Global database instance
-db = JSONDatabase()
+with profiler.stage("JSONDatabase init", category="core"):
+    db = JSONDatabase()
@@ -0,0 +1,125 @@
+"""yt-dlp downloads run in a worker pool instead of on the event loop"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .lazy_import import lazy_import
+from .logging import logger
+import config
+
+yt_dlp = lazy_import("yt_dlp")
+
+
+class FileTooLargeError(Exception):
+    """The media is bigger than the caller allows; carries the extracted info"""
+
+    def __init__(self, info: Dict[str, Any]):
+        super().__init__(f"File is too large: {info.get('filesize')} bytes")
+        self.info = info
+
+
+class DownloadService:
+    """Run yt-dlp extraction, download and postprocessing in worker threads
+
+    yt-dlp blocks on network I/O and waits for ffmpeg, so running it inside
+    a handler stalls every chat. Jobs run in a bounded thread pool; extra
+    jobs wait for a free worker. Progress hooks fire on the worker thread
+    and are handed back to the event loop, so callbacks can create tasks
+    and edit messages as usual.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Jobs submitted and not finished, and jobs a worker is running.
+        # Worker threads update them too, so changes hold _counter_lock
+        self.pending = 0
+        self.active = 0
+        self._counter_lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Running and queued downloads, for health checks"""
+        with self._counter_lock:
+            pending, active = self.pending, self.active
+        return {
+            "workers": self.workers,
+            "active": active,
+            "waiting": pending - active,
+        }
+
+    def _count(self, pending: int = 0, active: int = 0):
+        with self._counter_lock:
+            self.pending += pending
+            self.active += active
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="download"
+            )
+        return self._executor
+
+    async def download(
+        self,
+        url: str,
+        options: Dict[str, Any],
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        max_filesize: Optional[int] = None,
+    ) -> Tuple[Dict[str, Any], str]:
+        """Extract, download and postprocess a URL; returns (info, file path)
+
+        `progress` is called on the event loop with each yt-dlp progress
+        dict. Raises FileTooLargeError before downloading when the reported
+        size exceeds max_filesize.
+        """
+        loop = asyncio.get_running_loop()
+        options = dict(options)
+        if progress is not None:
+            options["progress_hooks"] = [
+                lambda d: loop.call_soon_threadsafe(progress, d)
+            ]
+
+        self._count(pending=1)
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), self._run_job, url, options, max_filesize
+            )
+        finally:
+            self._count(pending=-1)
+
+    def _run_job(self, url: str, options: Dict[str, Any], max_filesize: Optional[int]):
+        self._count(active=1)
+        try:
+            with yt_dlp.YoutubeDL(options) as ydl:
+                info = ydl.extract_info(url, download=False)
+                if max_filesize and (info.get("filesize") or 0) > max_filesize:
+                    raise FileTooLargeError(info)
+
+                # Download the already extracted info instead of extracting
+                # again, falling back to a full run like yt-dlp itself does
+                try:
+                    info = ydl.process_ie_result(info, download=True)
+                except (yt_dlp.utils.DownloadError, yt_dlp.utils.ReExtractInfo):
+                    info = ydl.extract_info(url, download=True)
+                downloads = info.get("requested_downloads") or []
+                path = downloads[0].get("filepath") if downloads else None
+                if not path:
+                    path = ydl.prepare_filename(info)
+        finally:
+            self._count(active=-1)
+        logger.debug(f"Downloaded {url} to {os.path.basename(path)}")
+        return info, path
+
+    def shutdown(self):
+        """Stop the worker threads once running downloads finish"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global download service instance
+download_service = DownloadService(workers=config.DOWNLOAD_WORKERS)
@@ -2,7 +2,9 @@ import os
 import importlib
 import sys
 from ..logging import logger
+from startup_profiler import profiler
 from ..bot import bot_instance
+from ..help_registry import help_registry
 
 
 def load_commands():
@@ -14,7 +16,8 @@ def load_commands():
         if filename.endswith(".py") and filename != "__init__.py":
             module_name = f"src.commands.{filename[:-3]}"
             try:
-                importlib.import_module(module_name)
+                with profiler.stage(module_name, category="command"):
+                    importlib.import_module(module_name)
                 logger.info(f"Loaded command module: {module_name}")
                 loaded_count += 1
             except ImportError as e:
@@ -37,15 +40,63 @@ def register_commands():
         bot_instance.register_command(cmd_name, handler)
         logger.info(f"Registered command: {cmd_name}")
 
+    # Precompute help info for the loaded commands
+    help_registry.rebuild()
 
-def reload_commands():
-    """Reload all command modules and re-register them"""
-    commands_dir = "src/commands"
 
-    # Clear existing command registrations
+def reload_command_module(module_name):
+    """Reload a single command module and swap in its handlers
+
+    Handlers keep serving the old code until the module has been re-executed
+    successfully; commands the module no longer defines are unregistered.
+    """
     from .. import commands
 
-    commands.clear()
+    previous = {
+        name: handler
+        for name, handler in commands.items()
+        if getattr(handler, "__module__", None) == module_name
+    }
+
+    if module_name in sys.modules:
+        importlib.reload(sys.modules[module_name])
+    else:
+        importlib.import_module(module_name)
+
+    current = set()
+    for cmd_name, handler in commands.items():
+        if getattr(handler, "__module__", None) != module_name:
+            continue
+        if previous.get(cmd_name) is handler:
+            # Not re-registered by the new code
+            continue
+        if bot_instance.get_command_handler(cmd_name) is not handler:
+            bot_instance.register_command(cmd_name, handler)
+        current.add(cmd_name)
+
+    for cmd_name in previous.keys() - current:
+        commands.pop(cmd_name, None)
+        bot_instance.unregister_command(cmd_name)
+
+    logger.debug(f"Reloaded command module: {module_name}")
+    return current
+
+
+def remove_command_module(module_name):
+    """Unregister all commands of a deleted command module"""
+    from .. import commands
+
+    for cmd_name, handler in list(commands.items()):
+        if getattr(handler, "__module__", None) == module_name:
+            commands.pop(cmd_name, None)
+            bot_instance.unregister_command(cmd_name)
+    sys.modules.pop(module_name, None)
+    logger.info(f"Removed command module: {module_name}")
+
+
+def reload_commands():
+    """Reload all command modules and re-register them"""
+    commands_dir = "src/commands"
 
     # Reload all command modules
     reloaded_count = 0
@@ -53,25 +104,13 @@ def reload_commands():
         if filename.endswith(".py") and filename != "__init__.py":
             module_name = f"src.commands.{filename[:-3]}"
             try:
-                if module_name in sys.modules:
-                    importlib.reload(sys.modules[module_name])
-                else:
-                    importlib.import_module(module_name)
+                reload_command_module(module_name)
                 reloaded_count += 1
-                logger.debug(f"Reloaded command module: {module_name}")
             except Exception as e:
                 logger.error(f"Failed to reload command module {module_name}: {e}")
 
-    # Re-register commands
-    register_commands()
-
-    # Also reload the unknown command handler to ensure it's up to date
-    try:
-        if "src.commands.unknown" in sys.modules:
-            importlib.reload(sys.modules["src.commands.unknown"])
-            logger.debug("Reloaded unknown command handler")
-    except Exception as e:
-        logger.error(f"Failed to reload unknown command handler: {e}")
+    # Refresh cached help pages
+    help_registry.rebuild()
 
     logger.info(f"Reloaded and re-registered {reloaded_count} command modules")
     return reloaded_count
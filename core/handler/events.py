@@ -2,6 +2,7 @@ import os
 import importlib
 import sys
 from ..logging import logger
+from startup_profiler import profiler
 
 
 def load_events():
@@ -13,7 +14,8 @@ def load_events():
         if filename.endswith(".py") and filename != "__init__.py":
             module_name = f"src.events.{filename[:-3]}"
             try:
-                importlib.import_module(module_name)
+                with profiler.stage(module_name, category="event"):
+                    importlib.import_module(module_name)
                 logger.info(f"Loaded event module: {module_name}")
                 loaded_count += 1
             except ImportError as e:
@@ -33,6 +35,34 @@ def register_events():
     pass
 
 
+def reload_event_module(module_name):
+    """Reload a single event module and swap in its handlers
+
+    Event modules re-register their handlers on import, which swaps the
+    targets of their existing routes; handlers the new code no longer
+    registers are detached.
+    """
+    from ..bot import bot_instance
+
+    if module_name in sys.modules:
+        module = importlib.reload(sys.modules[module_name])
+    else:
+        module = importlib.import_module(module_name)
+
+    bot_instance.unregister_stale_events(module_name, module)
+    logger.debug(f"Reloaded event module: {module_name}")
+    return module
+
+
+def remove_event_module(module_name):
+    """Detach all handlers of a deleted event module"""
+    from ..bot import bot_instance
+
+    bot_instance.unregister_stale_events(module_name)
+    sys.modules.pop(module_name, None)
+    logger.info(f"Removed event module: {module_name}")
+
+
 def reload_events():
     """Reload all event modules"""
     events_dir = "src/events"
@@ -43,12 +73,8 @@ def reload_events():
         if filename.endswith(".py") and filename != "__init__.py":
             module_name = f"src.events.{filename[:-3]}"
             try:
-                if module_name in sys.modules:
-                    importlib.reload(sys.modules[module_name])
-                else:
-                    importlib.import_module(module_name)
+                reload_event_module(module_name)
                 reloaded_count += 1
-                logger.debug(f"Reloaded event module: {module_name}")
             except Exception as e:
                 logger.error(f"Failed to reload event module {module_name}: {e}")
 
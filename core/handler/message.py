@@ -1,4 +1,5 @@
 from ..logging import logger
+from startup_profiler import profiler
 from ..bot import bot_instance
 
 
@@ -15,7 +16,8 @@ def load_message_handlers():
         if filename.endswith(".py") and filename != "__init__.py":
             module_name = f"src.events.{filename[:-3]}"
             try:
-                importlib.import_module(module_name)
+                with profiler.stage(module_name, category="event"):
+                    importlib.import_module(module_name)
                 logger.info(f"Loaded message handler module: {module_name}")
                 loaded_count += 1
             except ImportError as e:
@@ -0,0 +1,117 @@
+"""Precomputed help registry and rendered help pages"""
+
+import html
+import sys
+from typing import Dict, Optional, Tuple
+
+from . import lang as lang_module
+from .logging import logger
+
+COMMANDS_PACKAGE = "src.commands."
+
+
+class HelpRegistry:
+    """Caches command help info and the rendered /help pages.
+
+    The registry is built from the command modules already imported by the
+    command loader, so rendering help never imports anything. Pages are
+    rendered lazily per language and kept until the registry is invalidated
+    by a reload or a newly added command.
+    """
+
+    def __init__(self, page_size: int = 15):
+        self.page_size = page_size
+        self._commands: Optional[Dict[str, Dict]] = None
+        self._pages: Dict[Tuple[str, int], str] = {}
+        self._details: Dict[Tuple[str, str], str] = {}
+
+    def invalidate(self):
+        """Drop cached help info and rendered pages"""
+        self._commands = None
+        self._pages.clear()
+        self._details.clear()
+        logger.debug("Help registry invalidated")
+
+    def rebuild(self) -> int:
+        """Collect help info from all loaded command modules"""
+        self.invalidate()
+        commands_info = {}
+        for module_name, module in list(sys.modules.items()):
+            if not module_name.startswith(COMMANDS_PACKAGE) or module is None:
+                continue
+            help_func = getattr(module, "help", None)
+            if not callable(help_func):
+                continue
+            try:
+                cmd_info = help_func()
+                commands_info[cmd_info["name"]] = cmd_info
+            except Exception as e:
+                logger.error(f"Failed to read help info from {module_name}: {e}")
+
+        self._commands = dict(sorted(commands_info.items()))
+        logger.debug(f"Help registry built with {len(self._commands)} commands")
+        return len(self._commands)
+
+    @property
+    def commands(self) -> Dict[str, Dict]:
+        """Help info for every loaded command, keyed by name"""
+        if self._commands is None:
+            self.rebuild()
+        return self._commands
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages in the general help"""
+        return max(1, -(-len(self.commands) // self.page_size))
+
+    def render_page(self, page: int = 1) -> str:
+        """Get the rendered general help page (1-based)"""
+        page = min(max(page, 1), self.page_count)
+        key = (lang_module.current_lang, page)
+        if key not in self._pages:
+            self._pages[key] = self._render_page(page)
+        return self._pages[key]
+
+    def render_command(self, cmd_name: str) -> Optional[str]:
+        """Get the rendered help for a single command, or None if unknown"""
+        if cmd_name not in self.commands:
+            return None
+        key = (lang_module.current_lang, cmd_name)
+        if key not in self._details:
+            self._details[key] = self._render_command(self.commands[cmd_name])
+        return self._details[key]
+
+    def _render_page(self, page: int) -> str:
+        lang = lang_module.get_lang()
+        names = list(self.commands)
+        start = (page - 1) * self.page_size
+
+        lines = [f"┌─{lang.help_title}─┐"]
+        for cmd_name in names[start : start + self.page_size]:
+            description = html.escape(self.commands[cmd_name].get("description", ""))
+            lines.append(f"│ /{cmd_name:<10} - {description}")
+        lines.append("└─────────────────────────┘")
+
+        pages = self.page_count
+        if pages > 1:
+            lines.append(
+                lang.help_page_footer.format(
+                    page=page, pages=pages, next_page=page % pages + 1
+                )
+            )
+        return "\n".join(lines)
+
+    def _render_command(self, info: Dict) -> str:
+        lang = lang_module.get_lang()
+        return (
+            f"🛠 <b>{lang.help_command_label}:</b> /{html.escape(info['name'])}\n"
+            f"📝 <i>{html.escape(info.get('description', ''))}</i>\n\n"
+            f"<b>{lang.help_usage_label}:</b> "
+            f"<code>{html.escape(info.get('usage', '/' + info['name']))}</code>\n"
+            f"<b>{lang.help_author_label}:</b> {html.escape(str(info.get('author', '')))}\n"
+            f"<b>{lang.help_version_label}:</b> {html.escape(str(info.get('version', '')))}"
+        )
+
+
+# Global help registry instance
+help_registry = HelpRegistry()
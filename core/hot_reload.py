@@ -0,0 +1,200 @@
+"""File-watching incremental hot reload for commands and events"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from typing import Dict, Optional, Set
+
+from .logging import logger
+
+# inotify event masks (see inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+IN_EVENT_HEADER = struct.Struct("iIII")
+
+# Watched plugin directories and the packages their modules live in
+WATCHED_DIRS = {
+    "src/commands": "src.commands",
+    "src/events": "src.events",
+}
+
+
+class HotReloader:
+    """Watch plugin directories and reload only the modules that changed
+
+    Uses inotify on Linux and falls back to polling file modification times
+    elsewhere. Bursts of file events (editors often write a file several
+    times) are debounced into a single reload batch.
+    """
+
+    def __init__(self, debounce: float = 0.5, poll_interval: float = 1.0):
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.backend = None
+        self._pending: Set[str] = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._inotify_fd: Optional[int] = None
+        self._watch_dirs: Dict[int, str] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def running(self) -> bool:
+        return self.backend is not None
+
+    def start(self):
+        """Start watching (must be called from the running event loop)"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+
+        if sys.platform.startswith("linux") and self._start_inotify():
+            self.backend = "inotify"
+        else:
+            self._mtimes = self._scan()
+            self._poll_task = self._loop.create_task(self._poll())
+            self.backend = "polling"
+        logger.info(f"Hot reload watcher started ({self.backend})")
+
+    def stop(self):
+        """Stop watching and drop pending reloads"""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._inotify_fd is not None:
+            self._loop.remove_reader(self._inotify_fd)
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+        self._pending.clear()
+        self.backend = None
+
+    # inotify backend
+
+    def _start_inotify(self) -> bool:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            for directory in WATCHED_DIRS:
+                wd = libc.inotify_add_watch(
+                    fd, os.path.abspath(directory).encode(), IN_WATCH_MASK
+                )
+                if wd < 0:
+                    os.close(fd)
+                    raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+                self._watch_dirs[wd] = directory
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable, falling back to polling: {e}")
+            self._watch_dirs.clear()
+            return False
+
+        self._inotify_fd = fd
+        self._loop.add_reader(fd, self._read_inotify)
+        return True
+
+    def _read_inotify(self):
+        try:
+            data = os.read(self._inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset + IN_EVENT_HEADER.size <= len(data):
+            wd, _mask, _cookie, length = IN_EVENT_HEADER.unpack_from(data, offset)
+            offset += IN_EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0").decode(errors="ignore")
+            offset += length
+            directory = self._watch_dirs.get(wd)
+            if directory and name:
+                self._schedule(os.path.join(directory, name))
+
+    # Polling backend
+
+    def _scan(self) -> Dict[str, float]:
+        mtimes = {}
+        for directory in WATCHED_DIRS:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".py"):
+                            mtimes[entry.path] = entry.stat().st_mtime
+            except OSError as e:
+                logger.error(f"Hot reload scan failed for {directory}: {e}")
+        return mtimes
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = self._scan()
+            for path in current.keys() | self._mtimes.keys():
+                if current.get(path) != self._mtimes.get(path):
+                    self._schedule(path)
+            self._mtimes = current
+
+    # Debounced reload
+
+    def _schedule(self, path: str):
+        if not path.endswith(".py") or os.path.basename(path) == "__init__.py":
+            return
+        self._pending.add(os.path.normpath(path))
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        self._flush_handle = self._loop.call_later(self.debounce, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        paths, self._pending = self._pending, set()
+        self.reload_paths(paths)
+
+    def reload_paths(self, paths):
+        """Reload, import or remove the plugin modules for the given file paths"""
+        from .handler.commands import reload_command_module, remove_command_module
+        from .handler.events import reload_event_module, remove_event_module
+        from .help_registry import help_registry
+
+        handlers = {
+            "src.commands": (reload_command_module, remove_command_module),
+            "src.events": (reload_event_module, remove_event_module),
+        }
+
+        reloaded, removed = [], []
+        for path in sorted(paths):
+            directory, filename = os.path.split(path)
+            package = WATCHED_DIRS.get(directory.replace(os.sep, "/"))
+            if not package:
+                continue
+            module_name = f"{package}.{filename[:-3]}"
+            reload_module, remove_module = handlers[package]
+            try:
+                if os.path.exists(path):
+                    reload_module(module_name)
+                    reloaded.append(module_name)
+                elif module_name in sys.modules:
+                    remove_module(module_name)
+                    removed.append(module_name)
+            except Exception as e:
+                # The previous handlers stay active until the file loads cleanly
+                logger.error(f"Hot reload failed for {module_name}: {e}")
+
+        if any(name.startswith("src.commands.") for name in reloaded + removed):
+            help_registry.rebuild()
+        if reloaded or removed:
+            logger.info(
+                f"Hot reloaded {len(reloaded)} module(s), removed {len(removed)}: "
+                f"{', '.join(reloaded + removed)}"
+            )
+
+
+# Global hot reloader instance
+hot_reloader = HotReloader()
@@ -0,0 +1,52 @@
+"""Pooled HTTP session for the Telegram Bot API"""
+
+from typing import Optional
+
+from aiogram.client.session.aiohttp import AiohttpSession
+
+# Methods that may upload a file and need more than the regular timeout
+UPLOAD_METHODS = {
+    "sendAnimation",
+    "sendAudio",
+    "sendDocument",
+    "sendMediaGroup",
+    "sendPhoto",
+    "sendSticker",
+    "sendVideo",
+    "sendVideoNote",
+    "sendVoice",
+    "setChatPhoto",
+    "uploadStickerFile",
+}
+
+
+class TelegramSession(AiohttpSession):
+    """aiohttp session with explicit pool, keep-alive and DNS cache settings
+
+    One session (and one connection pool) is shared by every call the bot
+    makes, so bursts such as broadcasts reuse warm keep-alive connections
+    instead of paying TCP and TLS setup again. Regular calls use `timeout`;
+    uploads get `upload_timeout`, since a large file cannot finish in the
+    time a text message needs.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 30,
+        pool_size: int = 100,
+        keepalive_timeout: float = 60,
+        dns_cache_ttl: int = 3600,
+        upload_timeout: float = 300,
+    ):
+        super().__init__(limit=pool_size, timeout=timeout)
+        self.upload_timeout = upload_timeout
+        self._connector_init.update(
+            limit_per_host=pool_size,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=dns_cache_ttl,
+        )
+
+    async def make_request(self, bot, method, timeout: Optional[int] = None):
+        if timeout is None and method.__api_method__ in UPLOAD_METHODS:
+            timeout = max(self.timeout, self.upload_timeout)
+        return await super().make_request(bot, method, timeout=timeout)
@@ -66,3 +66,15 @@ bot_restarted = "Bot restart hoise successfully"
 bot_online = "Bot ekhon online"
 bot_offline = "Bot offline hocche"
 maintenance_mode = "Bot maintenance mode e"
+# Help strings
+help_title = "🤖 Komihub Bot Commands"
+help_page_footer = "Page {page}/{pages} • aro dekhte /help {next_page}"
+help_command_label = "Command"
+help_usage_label = "Usage"
+help_author_label = "Author"
+help_version_label = "Version"
+help_command_not_found = "Command '<code>{command}</code>' paowa jai nai.\nSob command dekhte /help use korun."
+# Command access strings
+command_chat_type_only = "Ei command sudhu ei chat e use kora jabe: {chat_types}"
+command_cooldown = "/{command} abar use korte {seconds}s wait korun"
+heavy_tasks_busy = "Bot ekhon onno download niye busy, ek minute pore abar try korun"
@@ -67,3 +67,15 @@ bot_restarted = "Bot restarted successfully"
 bot_online = "Bot is now online"
 bot_offline = "Bot is going offline"
 maintenance_mode = "Bot is in maintenance mode"
+# Help strings
+help_title = "🤖 Komihub Bot Commands"
+help_page_footer = "Page {page}/{pages} • /help {next_page} for more"
+help_command_label = "Command"
+help_usage_label = "Usage"
+help_author_label = "Author"
+help_version_label = "Version"
+help_command_not_found = "Command '<code>{command}</code>' not found.\nUse /help to see all available commands."
+# Command access strings
+command_chat_type_only = "This command can only be used in: {chat_types}"
+command_cooldown = "Please wait {seconds}s before using /{command} again"
+heavy_tasks_busy = "The bot is busy with other downloads, please try again in a minute"
@@ -0,0 +1,102 @@
+"""Deferred imports for heavy plugin dependencies"""
+
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .logging import logger
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access
+
+    Plugins can bind heavy dependencies at module level without paying the
+    import cost at startup::
+
+        yt_dlp = lazy_import("yt_dlp")
+
+        with yt_dlp.YoutubeDL(opts) as ydl:  # yt_dlp is imported here
+            ...
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self):
+        """Import the module if needed and return it"""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                    logger.debug(f"Lazily imported {self._name}")
+        return self._module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
+
+    def __dir__(self) -> List[str]:
+        return dir(self.load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+_lazy_modules: Dict[str, LazyModule] = {}
+_warm_up_hooks: List[Callable[[], Any]] = []
+_warm_up_thread: Optional[threading.Thread] = None
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Get the shared lazy proxy for a module"""
+    if name not in _lazy_modules:
+        _lazy_modules[name] = LazyModule(name)
+    return _lazy_modules[name]
+
+
+def register_warm_up(loader: Callable[[], Any]):
+    """Register an extra loader (e.g. an optional dependency) for warm-up"""
+    if loader not in _warm_up_hooks:
+        _warm_up_hooks.append(loader)
+
+
+def _warm_up():
+    for name, module in list(_lazy_modules.items()):
+        if module.loaded:
+            continue
+        try:
+            module.load()
+        except Exception as e:
+            logger.warning(f"Warm-up import of {name} failed: {e}")
+
+    for loader in list(_warm_up_hooks):
+        try:
+            loader()
+        except Exception as e:
+            logger.warning(f"Warm-up loader {loader.__name__} failed: {e}")
+
+    logger.info(
+        f"Warmed up {len(_lazy_modules)} lazy modules and {len(_warm_up_hooks)} loaders"
+    )
+
+
+def warm_up_lazy_modules():
+    """Import every registered lazy module in a background thread
+
+    Meant to run once the bot is online, so the first request that needs a
+    heavy dependency does not pay for its import.
+    """
+    global _warm_up_thread
+
+    if _warm_up_thread is not None and _warm_up_thread.is_alive():
+        return
+    _warm_up_thread = threading.Thread(
+        target=_warm_up, name="lazy-import-warmup", daemon=True
+    )
+    _warm_up_thread.start()
@@ -0,0 +1,134 @@
+"""Event loop lag monitor and blocking-call detector"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logging import logger
+from .metrics import metrics
+import config
+
+PLUGIN_DIRS = (os.path.join("src", "commands"), os.path.join("src", "events"))
+
+
+class LoopMonitor:
+    """Measure event loop lag and catch callbacks that block the loop
+
+    A heartbeat task sleeps for `interval` and records how late it wakes up.
+    A watchdog thread checks the heartbeat; when the loop has not come back
+    for `threshold` seconds it grabs the loop thread's stack, so the log
+    names the plugin and line that is blocking while it is still blocking.
+    """
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.5):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.last_stall: Optional[Dict[str, Any]] = None
+        self._last_beat = time.monotonic()
+        # (heartbeat, blocking site) captured by the watchdog for that beat
+        self._captured: Optional[Tuple[float, str]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Current lag and the last stall, for health checks"""
+        return {
+            "lag_ms": round(self.lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stall_threshold_ms": round(self.threshold * 1000),
+            "stalls": self.stalls,
+            "last_stall": self.last_stall,
+        }
+
+    def start(self):
+        """Start monitoring (must be called from the running event loop)"""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-monitor")
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+        logger.info(f"Event loop monitor started (stall threshold {self.threshold}s)")
+
+    def stop(self):
+        """Stop the heartbeat and the watchdog thread"""
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            beat = time.monotonic()
+            self._last_beat = beat
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+
+            self.lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, self.lag)
+            metrics.loop_lag.set(self.lag)
+            if self.lag >= self.threshold:
+                captured = self._captured
+                where = captured[1] if captured and captured[0] == beat else None
+                self._record_stall(self.lag, where)
+
+    def _record_stall(self, lag: float, where: Optional[str]):
+        self.stalls += 1
+        metrics.loop_stalls.inc()
+        self.last_stall = {
+            "duration_ms": round(lag * 1000, 1),
+            "at": time.time(),
+            "where": where,
+        }
+        logger.warning(
+            f"Event loop was blocked for {lag:.2f}s" + (f" in {where}" if where else "")
+        )
+
+    def _watch(self):
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat - self.interval
+            captured = self._captured
+            if blocked < self.threshold or (captured and captured[0] == beat):
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            where = self._blocking_site(stack)
+            self._captured = (beat, where)
+            logger.warning(
+                f"Event loop blocked for over {self.threshold}s in {where}, stack:\n"
+                + "".join(traceback.format_list(stack[-15:]))
+            )
+
+    @staticmethod
+    def _blocking_site(stack: List[traceback.FrameSummary]) -> str:
+        """Name the innermost plugin frame, or the innermost frame overall"""
+        for frame in reversed(stack):
+            if any(plugin_dir in frame.filename for plugin_dir in PLUGIN_DIRS):
+                break
+        else:
+            frame = stack[-1]
+        path = os.path.relpath(frame.filename) if frame.filename else "?"
+        return f"{path}:{frame.lineno} ({frame.name})"
+
+
+# Global loop monitor instance
+loop_monitor = LoopMonitor(threshold=config.LOOP_STALL_THRESHOLD)
@@ -0,0 +1,219 @@
+"""Cache of Telegram file_ids for media the bot already uploaded"""
+
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+
+from .database import db
+from .logging import logger
+
+# Query parameters that only track where a link was shared
+TRACKING_PARAMS = {
+    "s",
+    "si",
+    "igsh",
+    "igshid",
+    "fbclid",
+    "feature",
+    "ref",
+    "ref_src",
+    "share_id",
+    "is_from_webapp",
+    "sender_device",
+}
+
+# Sent to requests that joined a download of the same media
+WAITING_TEXT = (
+    "⏳ This is already being downloaded for another request, "
+    "it will be sent as soon as it is ready."
+)
+FAILED_TEXT = "❌ The download for this request failed, please try again."
+
+# Message method and media argument for each cached media kind
+SEND_METHODS = {
+    "audio": "answer_audio",
+    "video": "answer_video",
+    "photo": "answer_photo",
+    "document": "answer_document",
+}
+
+
+def normalize_url(url: str) -> str:
+    """Reduce a media URL to a stable cache key part
+
+    Drops the scheme, "www."/"m." prefixes, fragments and tracking
+    parameters, and sorts the remaining query so equivalent links match.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
+
+
+class MediaCache:
+    """Map a media source and format to the file_id of its first upload
+
+    Telegram keeps every uploaded file, so a repeat request is answered by
+    sending the stored file_id: one API call, no download, conversion or
+    upload. Entries live in media_cache.json and are reloaded when another
+    process changes the file.
+
+    join() and single_flight() let concurrent requests for the same key share
+    one download: the first request produces the media and also answers the
+    ones that joined it, so they never wait for a worker of their own.
+    Requests are only shared within one process; another webhook shard may
+    download the same media at the same time, and whichever stores its
+    cache entry first serves the requests after that.
+    """
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._mtime = None
+        # Key -> messages waiting for the request producing it
+        self._flights: Dict[str, List[Message]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            mtime = os.path.getmtime(db.files["media_cache"])
+        except OSError:
+            mtime = None
+        if self._entries is None or mtime != self._mtime:
+            self._entries = db.load_data("media_cache")
+            self._mtime = mtime
+        return self._entries
+
+    @staticmethod
+    def key(source: str, source_id: str, media_format: str) -> str:
+        """Build a cache key, e.g. key("youtube", video_id, "mp3-192")"""
+        return f"{source}:{source_id}:{media_format}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._load().get(key)
+        if entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    def set(self, key: str, kind: str, file_id: str, **params):
+        """Store the file_id of a sent message and the arguments it was sent with"""
+        with db.transaction("media_cache"):
+            entries = dict(self._load())
+            entries[key] = {
+                "kind": kind,
+                "file_id": file_id,
+                "params": params,
+                "cached_at": time.time(),
+            }
+            if len(entries) > self.max_entries:
+                # Drop the oldest entries
+                for old_key in sorted(entries, key=lambda k: entries[k]["cached_at"])[
+                    : len(entries) - self.max_entries
+                ]:
+                    del entries[old_key]
+            db.save_data("media_cache", entries)
+            self._entries = entries
+
+    def remember(self, key: str, sent: Message, **params):
+        """Cache the media of a message the bot just sent"""
+        for kind in SEND_METHODS:
+            media = getattr(sent, kind, None)
+            if media:
+                # Photos come in several sizes; the last one is the largest
+                file_id = media[-1].file_id if kind == "photo" else media.file_id
+                self.set(key, kind, file_id, **params)
+                return
+
+    def forget(self, key: str):
+        with db.transaction("media_cache"):
+            entries = dict(self._load())
+            if entries.pop(key, None) is not None:
+                db.save_data("media_cache", entries)
+                self._entries = entries
+
+    async def serve(self, message: Message, key: str) -> bool:
+        """Answer from the cache or through a download already running for key
+
+        Cheap enough for an update worker. False means the caller has to
+        produce the media itself, inside single_flight(key).
+        """
+        if await self.send(message, key):
+            return True
+        if self.join(key, message):
+            await message.answer(WAITING_TEXT)
+            return True
+        return False
+
+    def join(self, key: str, message: Message) -> bool:
+        """Answer message once the running request for key is done
+
+        Returns False when no request is producing key. The caller then
+        enters single_flight() itself, without awaiting anything in between,
+        so a second request cannot start the same download.
+        """
+        waiters = self._flights.get(key)
+        if waiters is None:
+            return False
+        waiters.append(message)
+        self.deduplicated += 1
+        return True
+
+    @asynccontextmanager
+    async def single_flight(self, key: str):
+        """Produce the media for key on behalf of every request that joins
+
+        The body downloads, sends and remember()s the media. Afterwards the
+        joined messages are answered from the cache entry, or told to try
+        again if the body stored none.
+        """
+        waiters = self._flights.setdefault(key, [])
+        try:
+            yield
+        finally:
+            self._flights.pop(key, None)
+            for message in waiters:
+                try:
+                    if not await self.send(message, key):
+                        await message.answer(FAILED_TEXT)
+                except Exception as e:
+                    logger.error(f"Failed to answer a request waiting for {key}: {e}")
+
+    async def send(self, message: Message, key: str) -> bool:
+        """Answer with the cached media for key; False if there is none
+
+        A file_id Telegram no longer accepts is dropped, and the caller
+        falls back to downloading again.
+        """
+        entry = self.get(key)
+        if not entry:
+            return False
+        method = getattr(message, SEND_METHODS[entry["kind"]])
+        try:
+            await method(entry["file_id"], **entry["params"])
+        except TelegramBadRequest as e:
+            logger.warning(f"Cached file for {key} was rejected, dropping it: {e}")
+            self.forget(key)
+            return False
+        logger.info(f"Served {key} from the media cache")
+        return True
+
+
+# Global media cache instance
+media_cache = MediaCache()
@@ -0,0 +1,248 @@
+"""Prometheus metrics for the bot (no-ops when prometheus-client is missing)"""
+
+import atexit
+import importlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, Optional
+
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramConflictError,
+    TelegramEntityTooLarge,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramServerError,
+    TelegramUnauthorizedError,
+)
+
+from .optional_deps import prometheus_client
+import config
+
+# Directory where prometheus_client keeps values shared between processes
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Error label for failed Telegram API calls, by exception class
+API_ERROR_CODES = (
+    (TelegramRetryAfter, "429"),
+    (TelegramEntityTooLarge, "413"),
+    (TelegramBadRequest, "400"),
+    (TelegramUnauthorizedError, "401"),
+    (TelegramForbiddenError, "403"),
+    (TelegramNotFound, "404"),
+    (TelegramConflictError, "409"),
+    (TelegramServerError, "5xx"),
+    (TelegramNetworkError, "network"),
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+def _prepare_multiprocess_dir() -> Optional[str]:
+    """Set up the directory webhook shards write their metrics to
+
+    prometheus_client chooses where metric values live when it is imported,
+    so this runs before the import. With WEBHOOK_WORKERS > 1 the front
+    process creates a temporary directory (unless PROMETHEUS_MULTIPROC_DIR
+    names one) and exports it, and the shard processes it spawns inherit it.
+    """
+    path = os.environ.get(MULTIPROC_ENV)
+    if multiprocessing.parent_process() is not None:
+        # A shard: the front process prepared the directory
+        return path
+    if not path:
+        if config.WEBHOOK_WORKERS <= 1:
+            return None
+        path = tempfile.mkdtemp(prefix="komihub-metrics-")
+        os.environ[MULTIPROC_ENV] = path
+        atexit.register(shutil.rmtree, path, True)
+    else:
+        # Files left by a previous run would be added to this run's values
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.endswith(".db"):
+                os.remove(os.path.join(path, name))
+    return path
+
+
+class _CallbackGauge:
+    """Collector reporting a gauge read from a callback at scrape time"""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.func: Optional[Callable[[], float]] = None
+
+    def collect(self):
+        if self.func is None:
+            return []
+        family = prometheus_client.metrics_core.GaugeMetricFamily(
+            self.name, self.documentation, value=float(self.func())
+        )
+        return [family]
+
+
+class _NoopMetric:
+    """Stand-in accepting every metric call when metrics are disabled"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+    def set_function(self, func):
+        pass
+
+
+class Metrics:
+    """Bot metrics kept in a private registry and served by /metrics
+
+    Every hot-path call is a counter or histogram update in memory; queue
+    depths are read through callbacks only when the endpoint is scraped.
+
+    With webhook shards, handlers run in other processes than the one
+    serving /metrics. Values then live in memory-mapped files in a shared
+    directory (prometheus_client's multiprocess mode) and render() merges
+    the files of every process with the front's own collectors.
+    """
+
+    def __init__(self):
+        self.multiprocess_dir = _prepare_multiprocess_dir()
+        prom = prometheus_client.load()
+        self.enabled = prom is not None
+        self.registry = prom.CollectorRegistry() if self.enabled else None
+
+        if self.enabled:
+            if self.multiprocess_dir:
+                importlib.import_module("prometheus_client.multiprocess")
+            prom.ProcessCollector(registry=self.registry)
+            prom.GCCollector(registry=self.registry)
+            self._queue_depth = _CallbackGauge(
+                "komihub_update_queue_depth", "Updates waiting to be processed"
+            )
+            self.registry.register(self._queue_depth)
+
+        self.updates_received = self._metric(
+            "Counter", "komihub_updates_received_total", "Updates received", ["source"]
+        )
+        self.updates_rejected = self._metric(
+            "Counter",
+            "komihub_updates_rejected_total",
+            "Updates rejected because the update queue was full",
+            ["source"],
+        )
+        self.command_duration = self._metric(
+            "Histogram",
+            "komihub_command_duration_seconds",
+            "Command handler run time",
+            ["command"],
+            buckets=LATENCY_BUCKETS,
+        )
+        self.command_errors = self._metric(
+            "Counter",
+            "komihub_command_errors_total",
+            "Command handlers that raised",
+            ["command"],
+        )
+        self.commands_in_flight = self._metric(
+            "Gauge",
+            "komihub_commands_in_flight",
+            "Command handlers currently running (download and image pipelines)",
+            ["command"],
+            multiprocess_mode="livesum",
+        )
+        self.api_duration = self._metric(
+            "Histogram",
+            "komihub_telegram_api_duration_seconds",
+            "Telegram Bot API call time",
+            ["method"],
+            buckets=LATENCY_BUCKETS,
+        )
+        self.api_errors = self._metric(
+            "Counter",
+            "komihub_telegram_api_errors_total",
+            "Failed Telegram Bot API calls",
+            ["method", "code"],
+        )
+        self.storage_flush = self._metric(
+            "Histogram",
+            "komihub_storage_flush_seconds",
+            "Time to write a database file",
+            ["db"],
+            buckets=LATENCY_BUCKETS,
+        )
+        self.loop_lag = self._metric(
+            "Gauge",
+            "komihub_event_loop_lag_seconds",
+            "Latest event loop lag sample",
+            multiprocess_mode="livemax",
+        )
+        self.loop_stalls = self._metric(
+            "Counter",
+            "komihub_event_loop_stalls_total",
+            "Times the event loop was blocked longer than the stall threshold",
+        )
+
+    def _metric(self, kind: str, name: str, documentation: str, labels=(), **kwargs):
+        if not self.enabled:
+            return _NoopMetric()
+        metric_class = getattr(prometheus_client, kind)
+        # Shared metrics are collected from the files, not from a registry
+        registry = None if self.multiprocess_dir else self.registry
+        return metric_class(name, documentation, labels, registry=registry, **kwargs)
+
+    def track_queue_depth(self, depth: Callable[[], float]):
+        """Read the update queue depth from a callback at scrape time"""
+        if self.enabled:
+            self._queue_depth.func = depth
+
+    def process_exited(self, pid: int):
+        """Drop the live gauges of a shard process that stopped"""
+        if self.enabled and self.multiprocess_dir:
+            prometheus_client.multiprocess.mark_process_dead(pid, self.multiprocess_dir)
+
+    def render(self):
+        """Get the exposition body and its content type"""
+        body = prometheus_client.generate_latest(self.registry)
+        if self.multiprocess_dir:
+            shared = prometheus_client.CollectorRegistry()
+            prometheus_client.multiprocess.MultiProcessCollector(
+                shared, self.multiprocess_dir
+            )
+            body = prometheus_client.generate_latest(shared) + body
+        return body, prometheus_client.CONTENT_TYPE_LATEST
+
+    async def api_middleware(self, make_request, bot, method):
+        """Session middleware timing Bot API calls and counting their errors"""
+        name = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            code = next(
+                (code for error, code in API_ERROR_CODES if isinstance(e, error)),
+                type(e).__name__,
+            )
+            self.api_errors.labels(name, code).inc()
+            raise
+        finally:
+            self.api_duration.labels(name).observe(time.perf_counter() - started)
+
+
+# Global metrics instance
+metrics = Metrics()
@@ -11,13 +11,12 @@ class UserMiddleware(BaseMiddleware):
     """Middleware to handle user registration and checks"""
 
     async def __call__(self, handler, event: Message, data):
-        try:
-            # Skip if no user (e.g., channel posts)
-            if not hasattr(event, "from_user") or not event.from_user:
-                return await handler(event, data)
-
-            user_id = event.from_user.id
+        # Skip if no user (e.g., channel posts)
+        if not hasattr(event, "from_user") or not event.from_user:
+            return await handler(event, data)
 
+        user_id = event.from_user.id
+        try:
             # Check if user is banned
             if db.is_banned(user_id):
                 ban_info = db.get_ban_info(user_id)
@@ -34,30 +33,28 @@ class UserMiddleware(BaseMiddleware):
                     # Remove invalid ban entry
                     db.unban_user(user_id)
 
-            # Add/update user in database
-            db.add_user(
-                user_id,
-                {
-                    "username": event.from_user.username,
-                    "first_name": event.from_user.first_name,
-                    "last_name": event.from_user.last_name,
-                },
-            )
-
-            # Update user activity
-            db.update_user(user_id, last_seen=None)  # Will set current timestamp
+            # Add/update user in database (also refreshes last_seen)
+            user_data = {
+                "username": event.from_user.username,
+                "first_name": event.from_user.first_name,
+                "last_name": event.from_user.last_name,
+                "language_code": event.from_user.language_code,
+            }
+            if event.chat.type == "private":
+                # The bot can only message users who opened a private chat
+                user_data["private_chat"] = True
+            else:
+                db.touch_chat(event.chat.id, event.chat.type, event.chat.title)
+            db.add_user(user_id, user_data)
 
             # Track command usage if it's a command
             if event.text and event.text.startswith("/"):
                 command_name = event.text.split()[0].lstrip("/")
                 db.increment_command_usage(command_name, user_id)
 
-            # Continue with handler
-            return await handler(event, data)
-
         except Exception as e:
-            logger.error(
-                f"Middleware error for user {event.from_user.id if event.from_user else 'unknown'}: {e}"
-            )
             # Continue with handler even if middleware fails
-            return await handler(event, data)
+            logger.error(f"Middleware error for user {user_id}: {e}")
+
+        # Errors raised by the handler itself are not retried
+        return await handler(event, data)
@@ -3,7 +3,7 @@ Optional dependency handler for KOMIHUB Bot
 Provides fallback mechanisms for missing optional dependencies
 """
 import importlib
-import logger
+from .logging import logger
 from typing import Optional, Any
 
 class OptionalDependency:
@@ -20,16 +20,16 @@ class OptionalDependency:
         if self._loaded:
             return self._module
         
+        # Only try the import once; a missing package stays missing
+        self._loaded = True
         try:
             self._module = importlib.import_module(self.package_name)
-            self._loaded = True
             logger.debug(f"Successfully loaded optional dependency: {self.package_name}")
             return self._module
         except ImportError as e:
             if self.fallback_name:
                 try:
                     self._module = importlib.import_module(self.fallback_name)
-                    self._loaded = True
                     logger.debug(f"Loaded fallback dependency: {self.fallback_name}")
                     return self._module
                 except ImportError:
@@ -50,6 +50,7 @@ toml = OptionalDependency("toml")
 pyqrcode = OptionalDependency("pyqrcode", "pyqrcode")
 qrcode = OptionalDependency("qrcode", "qrcode")
 pypng = OptionalDependency("pypng")
+prometheus_client = OptionalDependency("prometheus_client")
 
 def check_optional_deps():
     """Check which optional dependencies are available"""
@@ -0,0 +1,121 @@
+"""Declarative command metadata and router-level access checks"""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from aiogram.types import Message
+
+from .database import db
+from .lang import get_lang
+from .logging import logger
+
+# Roles a command can require, mapped to the admins.json list granting them.
+# "owner" is the configured bot owner (config.ADMIN_ID), "admin" is anyone
+# in any admin list. The owner passes every role check.
+ROLES = {
+    "owner": None,
+    "admin": None,
+    "elder": "elders",
+    "gc_admin": "gc_admins",
+    "ch_admin": "ch_admins",
+}
+# "heavy" commands run in the heavy task pool instead of on an update worker
+COST_CLASSES = ("light", "normal", "heavy")
+CHAT_TYPES = ("private", "group", "supergroup", "channel")
+
+
+@dataclass(frozen=True)
+class CommandMeta:
+    """Metadata declared with the @command decorator"""
+
+    role: Optional[str] = None
+    chat_types: Optional[Tuple[str, ...]] = None
+    cost: str = "normal"
+    cooldown: float = 0
+    inline_reply: bool = False
+
+    def __post_init__(self):
+        if self.role is not None and self.role not in ROLES:
+            raise ValueError(f"Unknown command role: {self.role}")
+        if self.cost not in COST_CLASSES:
+            raise ValueError(f"Unknown command cost class: {self.cost}")
+        if self.chat_types is not None:
+            unknown = set(self.chat_types) - set(CHAT_TYPES)
+            if unknown:
+                raise ValueError(f"Unknown chat types: {', '.join(sorted(unknown))}")
+            object.__setattr__(self, "chat_types", tuple(self.chat_types))
+
+
+def has_role(user_id: int, role: Optional[str]) -> bool:
+    """Check a user against a command role using the cached role index"""
+    import config
+
+    if role is None or user_id == config.ADMIN_ID:
+        return True
+    if role == "owner":
+        return False
+
+    admin_types = db.get_role_index().get(user_id)
+    if not admin_types:
+        return False
+    return ROLES[role] is None or ROLES[role] in admin_types
+
+
+class CommandGuard:
+    """Enforce command metadata before a handler runs"""
+
+    def __init__(self):
+        self._last_used: Dict[Tuple[int, str], float] = {}
+
+    async def check(self, command_name: str, handler, message: Message) -> bool:
+        """Return True if the handler may run, otherwise answer the user"""
+        meta = getattr(handler, "_command_meta", None)
+        if meta is None:
+            return True
+
+        lang = get_lang()
+        user_id = message.from_user.id if message.from_user else None
+
+        if meta.role and (user_id is None or not has_role(user_id, meta.role)):
+            if meta.role == "owner":
+                reason = lang.owner_only_command
+            elif meta.role == "admin":
+                reason = lang.admin_only_command
+            else:
+                reason = lang.permission_denied
+            logger.info(f"Rejected /{command_name} from user {user_id}: requires {meta.role}")
+            await message.answer(f"❌ {reason}.")
+            return False
+
+        if meta.chat_types and message.chat.type not in meta.chat_types:
+            chat_types = ", ".join(meta.chat_types)
+            await message.answer(
+                f"❌ {lang.command_chat_type_only.format(chat_types=chat_types)}."
+            )
+            return False
+
+        if meta.cooldown and user_id is not None:
+            now = time.monotonic()
+            key = (user_id, command_name)
+            remaining = meta.cooldown - (now - self._last_used.get(key, float("-inf")))
+            if remaining > 0:
+                await message.answer(
+                    f"⏳ {lang.command_cooldown.format(seconds=int(remaining) + 1, command=command_name)}"
+                )
+                return False
+            self._last_used[key] = now
+            if len(self._last_used) > 10000:
+                self._prune(now)
+
+        return True
+
+    def _prune(self, now: float):
+        """Drop cooldown entries older than any plausible cooldown"""
+        self._last_used = {
+            key: used for key, used in self._last_used.items() if now - used < 3600
+        }
+
+
+# Global command guard instance
+command_guard = CommandGuard()
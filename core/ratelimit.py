@@ -0,0 +1,172 @@
+"""Outbound rate limiting for Telegram Bot API calls"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Union
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from .logging import logger
+import config
+
+# Methods that post or change messages and count against Telegram's limits
+LIMITED_PREFIXES = ("send", "copy", "forward", "edit")
+
+# Minimum seconds between two progress edits of the same message
+PROGRESS_EDIT_INTERVAL = 2.0
+
+
+class TokenBucket:
+    """Token bucket that queues callers in order until a token is free"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def idle(self) -> bool:
+        """Whether the bucket is full and nobody is waiting on it"""
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity and not self._lock.locked()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Take a token, waiting for a refill or the end of a pause"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Hold every caller of this bucket for `seconds`"""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0
+        self.updated = now
+
+
+class RateLimiter:
+    """Session middleware keeping outbound calls within Telegram's limits
+
+    Message calls take a token from the global bucket and from their chat's
+    bucket (private chats and groups have different limits), waiting in line
+    instead of failing. A TelegramRetryAfter pauses only the scope it came
+    from, that chat or the global bucket for calls without one, and the call
+    is retried after the pause.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        group_per_minute: float = 20,
+        max_retries: int = 3,
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_per_minute / 60
+        self.group_per_minute = group_per_minute
+        self.max_retries = max_retries
+        self._chats: Dict[Union[int, str], TokenBucket] = {}
+        self._progress: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.waiting = 0
+        self.retried = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Queued calls and retry counters, for health checks"""
+        return {
+            "waiting": self.waiting,
+            "retried": self.retried,
+            "chat_buckets": len(self._chats),
+        }
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= 10000:
+                self._chats = {
+                    key: value for key, value in self._chats.items() if not value.idle
+                }
+            # Negative ids and @usernames are groups and channels
+            if isinstance(chat_id, str) or chat_id < 0:
+                bucket = TokenBucket(self.group_rate, self.group_per_minute)
+            else:
+                bucket = TokenBucket(self.chat_rate, 3)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def should_update_progress(self, key: Hashable, final: bool = False) -> bool:
+        """Check whether a progress message may be edited again
+
+        Progress hooks report many times a second; only one edit per
+        PROGRESS_EDIT_INTERVAL goes out, plus the final one.
+        """
+        now = time.monotonic()
+        last = self._progress.get(key)
+        if final:
+            self._progress.pop(key, None)
+            return True
+        if last is not None and now - last < PROGRESS_EDIT_INTERVAL:
+            return False
+        self._progress[key] = now
+        self._progress.move_to_end(key)
+        if len(self._progress) > 1000:
+            self._progress.popitem(last=False)
+        return True
+
+    async def middleware(self, make_request, bot, method):
+        """Wait for tokens before message calls and retry after RetryAfter"""
+        name = method.__api_method__
+        if not name.startswith(LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        chat_id: Optional[Union[int, str]] = getattr(method, "chat_id", None)
+        chat_bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+
+        for attempt in range(self.max_retries + 1):
+            self.waiting += 1
+            try:
+                # The chat bucket first, so a slow chat does not hold global tokens
+                if chat_bucket is not None:
+                    await chat_bucket.acquire()
+                await self.global_bucket.acquire()
+            finally:
+                self.waiting -= 1
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                scope = chat_bucket or self.global_bucket
+                scope.pause(e.retry_after)
+                self.retried += 1
+                logger.warning(
+                    f"Flood limit on {name} for "
+                    f"{'chat ' + str(chat_id) if chat_bucket else 'all chats'}, "
+                    f"retrying in {e.retry_after}s"
+                )
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(
+    global_rate=config.RATE_LIMIT_GLOBAL,
+    chat_rate=config.RATE_LIMIT_CHAT,
+    group_per_minute=config.RATE_LIMIT_GROUP_PER_MINUTE,
+)
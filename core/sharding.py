@@ -0,0 +1,210 @@
+"""Chat-sharded worker processes for webhook mode"""
+
+import asyncio
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Dict, Hashable, List
+
+from .database import PROCESS_LOCKS
+from .logging import logger
+from .metrics import metrics
+import config
+
+# Empty message telling a shard to finish its pending updates and exit
+_STOP = b""
+
+
+def _run_shard(index: int, conn):
+    """Entry point of a shard process"""
+    try:
+        asyncio.run(_serve_shard(index, conn))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _serve_shard(index: int, conn):
+    from aiogram.types import Update
+
+    from .bot import bot_instance
+    from .downloads import download_service
+    from .youtube import youtube_search
+    from .handler.commands import load_commands, register_commands
+    from .handler.events import load_events, register_events
+
+    load_commands()
+    register_commands()
+    load_events()
+    register_events()
+    bot_instance.start_background_services(resume_broadcasts=index == 0)
+    logger.info(f"Webhook shard {index} ready")
+
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                body = await loop.run_in_executor(None, conn.recv_bytes)
+            except EOFError:
+                break
+            if body == _STOP:
+                break
+            try:
+                update = Update.model_validate_json(body, context={"bot": bot_instance.bot})
+            except Exception as e:
+                logger.error(f"Shard {index} received an invalid update: {e}")
+                continue
+            await bot_instance.scheduler.put(update)
+    finally:
+        await bot_instance.scheduler.stop()
+        await bot_instance.heavy_tasks.stop()
+        download_service.shutdown()
+        await youtube_search.close()
+        await bot_instance.bot.session.close()
+        logger.info(f"Webhook shard {index} stopped")
+
+
+class _Shard:
+    """Front-side handle of one shard process"""
+
+    def __init__(self, index: int, context, max_pending: int):
+        self.index = index
+        parent_conn, child_conn = context.Pipe()
+        self.conn = parent_conn
+        self.process = context.Process(
+            target=_run_shard,
+            args=(index, child_conn),
+            name=f"webhook-shard-{index}",
+            daemon=True,
+        )
+        # Pipe writes block when the shard falls behind, so a thread does them
+        self.outbox: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.sender = threading.Thread(
+            target=self._send_loop, name=f"webhook-shard-{index}-sender", daemon=True
+        )
+        self.forwarded = 0
+
+    def start(self):
+        self.process.start()
+        self.sender.start()
+
+    def _send_loop(self):
+        while True:
+            body = self.outbox.get()
+            try:
+                self.conn.send_bytes(body)
+            except (BrokenPipeError, OSError) as e:
+                logger.error(f"Lost connection to webhook shard {self.index}: {e}")
+                return
+            if body == _STOP:
+                return
+            self.forwarded += 1
+
+
+class ShardPool:
+    """Forward webhook updates to worker processes chosen by chat
+
+    Each shard is a separate process running its own KomihubBot dispatcher
+    and update scheduler, so CPU-heavy handlers use more than one core.
+    Updates are routed by hashing their chat, which keeps every chat on one
+    shard and preserves per-chat ordering. The front process forwards the
+    raw request body and does not load any commands itself. Shards share
+    the JSON database, whose writes are serialized with file locks.
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = 1000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._context = multiprocessing.get_context("spawn")
+        self._shards: List[_Shard] = []
+        self.dropped = 0
+        self.restarts = 0
+        self.last_forwarded_at = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._shards)
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        """Per-shard forwarding counters for health checks and metrics"""
+        idle = None
+        if self.last_forwarded_at is not None:
+            idle = round(time.monotonic() - self.last_forwarded_at, 1)
+        pending = [shard.outbox.qsize() for shard in self._shards]
+        return {
+            "shards": len(self._shards),
+            "alive": sum(1 for shard in self._shards if shard.process.is_alive()),
+            "depth": sum(pending),
+            "max_depth": self.max_pending,
+            "pending": pending,
+            "forwarded": sum(shard.forwarded for shard in self._shards),
+            "dropped": self.dropped,
+            "restarts": self.restarts,
+            "seconds_since_last_update": idle,
+        }
+
+    def start(self):
+        """Spawn the shard processes"""
+        if self.running:
+            return
+        if not PROCESS_LOCKS:
+            raise RuntimeError("Webhook shards need file locking to share the JSON database")
+        per_shard = max(1, self.max_pending // self.workers)
+        self._shards = [
+            _Shard(index, self._context, per_shard) for index in range(self.workers)
+        ]
+        for shard in self._shards:
+            shard.start()
+        logger.info(f"Started {self.workers} webhook shard processes")
+
+    def _shard_for(self, key: Hashable) -> _Shard:
+        index = hash(key) % len(self._shards)
+        shard = self._shards[index]
+        if not shard.process.is_alive():
+            # Replace a crashed shard; its queued updates are lost
+            logger.error(
+                f"Webhook shard {index} exited with code {shard.process.exitcode}, restarting"
+            )
+            metrics.process_exited(shard.process.pid)
+            shard = _Shard(index, self._context, shard.outbox.maxsize)
+            shard.start()
+            self._shards[index] = shard
+            self.restarts += 1
+        return shard
+
+    def submit(self, key: Hashable, body: bytes) -> bool:
+        """Forward a raw update body to the shard owning its chat"""
+        if not self.running:
+            raise RuntimeError("Shard pool is not running")
+        shard = self._shard_for(key)
+        try:
+            shard.outbox.put_nowait(bytes(body))
+            self.last_forwarded_at = time.monotonic()
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Webhook shard {shard.index} is full, rejecting update")
+            return False
+
+    def stop(self, timeout: float = 10.0):
+        """Ask every shard to finish its pending updates, then stop it"""
+        for shard in self._shards:
+            try:
+                shard.outbox.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+        for shard in self._shards:
+            shard.sender.join(timeout)
+            shard.process.join(timeout)
+            if shard.process.is_alive():
+                logger.warning(f"Webhook shard {shard.index} did not stop, terminating")
+                shard.process.terminate()
+            metrics.process_exited(shard.process.pid)
+        self._shards = []
+
+
+# Global shard pool instance (only started when WEBHOOK_WORKERS > 1)
+shard_pool = ShardPool(
+    workers=config.WEBHOOK_WORKERS, max_pending=config.UPDATE_QUEUE_SIZE
+)
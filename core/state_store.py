@@ -0,0 +1,172 @@
+"""Short-lived keyed state for multi-step flows"""
+
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .logging import logger
+import config
+
+# Seconds between sweeps of expired entries
+PURGE_INTERVAL = 60
+
+# Open SQLite connections by file path, shared by all stores
+_connections: Dict[str, sqlite3.Connection] = {}
+
+
+def sqlite_path(url: Optional[str]) -> Optional[str]:
+    """File path of a sqlite:/// database URL, None for other URLs"""
+    if not url or not url.startswith("sqlite:///"):
+        return None
+    return url[len("sqlite:///"):]
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = _connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        # WAL lets webhook shards read and write the file at the same time
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "expires REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        _connections[path] = conn
+    return conn
+
+
+class StateStore:
+    """Keyed state with a per-entry TTL and an LRU size limit
+
+    Entries expire ttl seconds after they are set, and the least recently
+    used ones are dropped once max_entries is reached, so state that a user
+    never finishes does not pile up. Expired entries are swept every
+    PURGE_INTERVAL seconds.
+
+    With a SQLite path, entries are also written through to a shared table
+    under the store's namespace, so they survive plugin reloads and restarts
+    and are loaded back on a memory miss. Values must be JSON serializable.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float = 600,
+        max_entries: int = 10000,
+        path: Optional[str] = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._purged = time.time()
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        try:
+            return _connect(self.path)
+        except sqlite3.Error as e:
+            logger.error(f"State store {self.namespace} falls back to memory: {e}")
+            self.path = None
+            return None
+
+    def _execute(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Cursor]:
+        conn = self._db()
+        if conn is None:
+            return None
+        try:
+            return conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logger.error(f"State store {self.namespace} query failed: {e}")
+            return None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Value stored for key, or default when missing or expired"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is None:
+            cursor = self._execute(
+                "SELECT value, expires FROM state WHERE namespace = ? AND key = ?",
+                (self.namespace, str(key)),
+            )
+            row = cursor.fetchone() if cursor else None
+            if row:
+                entry = (row[1], json.loads(row[0]))
+                self._remember(key, entry)
+        if entry is None:
+            return default
+        if entry[0] <= now:
+            self.pop(key)
+            return default
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value for key, replacing it and restarting its TTL"""
+        now = time.time()
+        entry = (now + (self.ttl if ttl is None else ttl), value)
+        self._remember(key, entry)
+        self._execute(
+            "INSERT OR REPLACE INTO state (namespace, key, value, expires) "
+            "VALUES (?, ?, ?, ?)",
+            (self.namespace, str(key), json.dumps(value), entry[0]),
+        )
+        if now - self._purged >= PURGE_INTERVAL:
+            self.purge()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key and return its value if it had not expired"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            value = self.get(key, default)
+            self._entries.pop(key, None)
+        else:
+            value = entry[1] if entry[0] > time.time() else default
+        self._execute(
+            "DELETE FROM state WHERE namespace = ? AND key = ?",
+            (self.namespace, str(key)),
+        )
+        return value
+
+    def _remember(self, key: Hashable, entry: Tuple[float, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._execute(
+                "DELETE FROM state WHERE namespace = ? AND key = ?",
+                (self.namespace, str(old_key)),
+            )
+
+    def purge(self) -> int:
+        """Drop expired entries; returns how many were held in memory"""
+        now = time.time()
+        self._purged = now
+        expired = [key for key, entry in self._entries.items() if entry[0] <= now]
+        for key in expired:
+            del self._entries[key]
+        self._execute(
+            "DELETE FROM state WHERE namespace = ? AND expires <= ?",
+            (self.namespace, now),
+        )
+        return len(expired)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Search results waiting for the user to reply with a number
+search_state = StateStore(
+    "search", ttl=600, max_entries=5000, path=sqlite_path(config.DATABASE_URL)
+)
@@ -0,0 +1,115 @@
+"""Answer webhook updates with a Bot API call in the HTTP response"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from aiogram.types import Update
+
+from .logging import logger
+
+# Slot of the update being processed, set only while its handler runs
+_reply_slot: ContextVar[Optional[asyncio.Future]] = ContextVar(
+    "webhook_reply_slot", default=None
+)
+
+
+class WebhookReplies:
+    """Send the first outgoing call of cheap commands as the webhook response
+
+    Telegram accepts one Bot API method in the body of the webhook response,
+    which saves a separate request to api.telegram.org. Only commands
+    declared with inline_reply=True qualify, since an inline call returns no
+    result (the handler gets None instead of the sent Message). Calls that
+    upload files, and every call after the first, use the normal client.
+    """
+
+    def __init__(self):
+        self._slots: Dict[int, asyncio.Future] = {}
+        self.sent_inline = 0
+        self.timed_out = 0
+
+    @staticmethod
+    def is_eligible(update: Update, get_handler, bot_username: Optional[str]) -> bool:
+        """Check whether the update is a command declared with inline_reply
+
+        A command addressed to another bot (/start@other_bot) is not, and
+        neither is any /command@name while the bot's username is unknown.
+        """
+        message = update.message
+        if not message or not message.text or not message.text.startswith("/"):
+            return False
+        name, _, mention = message.text.split(maxsplit=1)[0][1:].partition("@")
+        if mention and (
+            not bot_username or mention.lower() != bot_username.lower()
+        ):
+            return False
+        meta = getattr(get_handler(name), "_command_meta", None)
+        return bool(meta and meta.inline_reply)
+
+    def expect(self, update_id: int):
+        """Open a reply slot for an update before it is scheduled"""
+        self._slots[update_id] = asyncio.get_running_loop().create_future()
+
+    def discard(self, update_id: int):
+        """Drop the slot of an update that was not scheduled"""
+        future = self._slots.pop(update_id, None)
+        if future is not None:
+            future.cancel()
+
+    async def wait(self, update_id: int, timeout: float) -> Optional[Dict[str, str]]:
+        """Wait for the handler's first call; None if it made none in time"""
+        future = self._slots.get(update_id)
+        if future is None:
+            return None
+        try:
+            await asyncio.wait((future,), timeout=timeout)
+        finally:
+            self._slots.pop(update_id, None)
+
+        if future.done() and not future.cancelled():
+            return future.result()
+        if not future.done():
+            # Too late for this response, the handler falls back to the client
+            future.cancel()
+            self.timed_out += 1
+        return None
+
+    @contextmanager
+    def slot(self, update_id: int):
+        """Expose the update's reply slot to outgoing calls made by its handler"""
+        future = self._slots.pop(update_id, None)
+        token = _reply_slot.set(future)
+        try:
+            yield
+        finally:
+            _reply_slot.reset(token)
+            if future is not None and not future.done():
+                future.cancel()
+
+    async def middleware(self, make_request, bot, method):
+        """Session middleware diverting the first eligible call into the slot"""
+        future = _reply_slot.get()
+        if future is None or future.done():
+            return await make_request(bot, method)
+
+        files = {}
+        params = {}
+        for key, value in method.model_dump(warnings=False).items():
+            prepared = bot.session.prepare_value(value, bot=bot, files=files)
+            if prepared is not None:
+                params[key] = prepared
+        if files:
+            # Uploads cannot go in the webhook response
+            return await make_request(bot, method)
+
+        params["method"] = method.__api_method__
+        future.set_result(params)
+        self.sent_inline += 1
+        logger.debug(f"Answering {method.__api_method__} in the webhook response")
+        return None
+
+
+# Global webhook reply instance
+webhook_replies = WebhookReplies()
@@ -0,0 +1,145 @@
+"""YouTube Data API search on the event loop, with a result cache"""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .logging import logger
+import config
+
+SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
+VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+
+ISO_DURATION = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+
+
+def format_duration(seconds: int) -> str:
+    """Format seconds into MM:SS"""
+    minutes = seconds // 60
+    seconds = seconds % 60
+    return f"{minutes}:{seconds:02d}"
+
+
+def parse_duration(duration: str) -> str:
+    """Turn an ISO 8601 duration (PT4M13S) into 4:13"""
+    match = ISO_DURATION.match(duration or "")
+    if not match:
+        return "Unknown"
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return format_duration(hours * 3600 + minutes * 60 + seconds)
+
+
+class YouTubeSearch:
+    """Search music videos with two API calls and cache the results
+
+    One search.list call finds the videos, then a single videos.list call
+    with the comma-joined ids fetches every duration and view count. Results
+    are kept for cache_ttl seconds per normalized query, so popular searches
+    repeated by many users do not reach the API at all.
+    """
+
+    def __init__(self, cache_ttl: int = 3600, max_entries: int = 500):
+        self.cache_ttl = cache_ttl
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=config.TIMEOUT)
+            )
+        return self._session
+
+    async def _get(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._get_session().get(url, params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def search(
+        self, query: str, api_key: str, max_results: int = 5
+    ) -> List[Dict[str, Any]]:
+        """Search YouTube music videos; returns [] when the API call fails"""
+        key = (self.normalize_query(query), max_results)
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+
+        try:
+            data = await self._get(
+                SEARCH_URL,
+                {
+                    "part": "snippet",
+                    "q": query,
+                    "type": "video",
+                    "maxResults": max_results,
+                    "key": api_key,
+                    "videoCategoryId": "10",  # Music category
+                },
+            )
+            items = [
+                item for item in data.get("items", []) if item["id"].get("videoId")
+            ]
+
+            details = {}
+            if items:
+                # Durations and view counts for all results in one call
+                details_data = await self._get(
+                    VIDEOS_URL,
+                    {
+                        "part": "contentDetails,statistics",
+                        "id": ",".join(item["id"]["videoId"] for item in items),
+                        "key": api_key,
+                    },
+                )
+                details = {video["id"]: video for video in details_data.get("items", [])}
+        except Exception as e:
+            logger.error(f"YouTube API search error: {e}")
+            return []
+
+        results = []
+        for item in items:
+            video_id = item["id"]["videoId"]
+            video = details.get(video_id)
+            # Videos without details are private or were removed
+            if not video:
+                continue
+            snippet = item["snippet"]
+            view_count = video.get("statistics", {}).get("viewCount", "0")
+            results.append(
+                {
+                    "title": snippet["title"],
+                    "channel": snippet["channelTitle"],
+                    "duration": parse_duration(video["contentDetails"]["duration"]),
+                    "views": f"{int(view_count):,}",
+                    "url": f"https://youtu.be/{video_id}",
+                    "video_id": video_id,
+                }
+            )
+
+        self._cache[key] = (time.monotonic() + self.cache_ttl, results)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return results
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+# Global YouTube search instance
+youtube_search = YouTubeSearch(cache_ttl=config.SEARCH_CACHE_TTL)
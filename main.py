@@ -1,11 +1,15 @@
 import asyncio
-from core.bot import bot_instance
-from core.handler.commands import load_commands, register_commands
-from core.handler.events import load_events, register_events
-from core.handler.message import load_message_handlers
-from core.pid_manager import pid_manager
-from core import logger
-import config
+from startup_profiler import profiler
+
+with profiler.stage("config load"):
+    import config
+with profiler.stage("core import"):
+    from core.bot import bot_instance
+    from core.handler.commands import load_commands, register_commands
+    from core.handler.events import load_events, register_events
+    from core.handler.message import load_message_handlers
+    from core.pid_manager import pid_manager
+    from core import logger
 
 
 def print_banner():
@@ -32,7 +36,8 @@ async def main():
 
     # Load and register commands
     try:
-        loaded, failed = load_commands()
+        with profiler.stage("load commands"):
+            loaded, failed = load_commands()
         logger.info(f"Commands loaded: {loaded}, failed: {failed}")
         if failed > 0:
             logger.warning(f"{failed} commands failed to load but bot will continue")
@@ -40,14 +45,16 @@ async def main():
         logger.error(f"Critical error loading commands: {e}")
 
     try:
-        register_commands()
+        with profiler.stage("register commands"):
+            register_commands()
         logger.info("Commands registered successfully")
     except Exception as e:
         logger.error(f"Critical error registering commands: {e}")
 
     # Load and register events
     try:
-        loaded, failed = load_events()
+        with profiler.stage("load events"):
+            loaded, failed = load_events()
         logger.info(f"Events loaded: {loaded}, failed: {failed}")
         if failed > 0:
             logger.warning(f"{failed} events failed to load but bot will continue")
@@ -70,6 +77,7 @@ async def main():
         logger.error(f"Critical error loading message handlers: {e}")
 
     # Start the bot
+    profiler.report()
     try:
         await bot_instance.start_polling()
     except Exception as e:
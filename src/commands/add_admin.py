@@ -16,13 +16,8 @@ def help():
     }
 
 
-@command("add_admin")
+@command("add_admin", role="owner")
 async def add_admin(message: Message):
-    # Check if user is owner
-    if message.from_user.id != config.ADMIN_ID:
-        await message.answer("❌ This command is only available to the owner.")
-        return
-
     logger.info(
         lang.log_command_executed.format(
             command="add_admin", user_id=message.from_user.id
@@ -110,13 +105,8 @@ async def add_admin(message: Message):
         await message.answer("❌ User is already an admin of this type.")
 
 
-@command("remove_admin")
+@command("remove_admin", role="owner")
 async def remove_admin(message: Message):
-    # Check if user is owner
-    if message.from_user.id != config.ADMIN_ID:
-        await message.answer("❌ This command is only available to the owner.")
-        return
-
     logger.info(
         lang.log_command_executed.format(
             command="remove_admin", user_id=message.from_user.id
@@ -196,13 +186,8 @@ async def remove_admin(message: Message):
         await message.answer("❌ User is not an admin of this type.")
 
 
-@command("list_admins")
+@command("list_admins", role="admin")
 async def list_admins(message: Message):
-    # Check if user is admin
-    if not db.is_admin(message.from_user.id):
-        await message.answer("❌ This command is only available to administrators.")
-        return
-
     logger.info(
         lang.log_command_executed.format(
             command="list_admins", user_id=message.from_user.id
@@ -241,23 +226,9 @@ async def list_admins(message: Message):
     await message.answer(admin_text, parse_mode="HTML")
 
 
-@command("add_admin_gc")
+@command("add_admin_gc", role="gc_admin", chat_types=("group", "supergroup"))
 async def add_admin_gc(message: Message):
     """Add group chat admin - only owner and existing gc_admins can use this"""
-    # Check if user is owner or gc_admin
-    if message.from_user.id != config.ADMIN_ID and not db.is_admin(
-        message.from_user.id, "gc_admins"
-    ):
-        await message.answer(
-            "❌ This command is only available to the owner or group chat admins."
-        )
-        return
-
-    # Check if this is a group chat
-    if message.chat.type not in ["group", "supergroup"]:
-        await message.answer("❌ This command can only be used in group chats.")
-        return
-
     logger.info(
         lang.log_command_executed.format(
             command="add_admin_gc", user_id=message.from_user.id
@@ -320,23 +291,9 @@ async def add_admin_gc(message: Message):
         await message.answer("❌ User is already a group chat admin.")
 
 
-@command("remove_admin_gc")
+@command("remove_admin_gc", role="gc_admin", chat_types=("group", "supergroup"))
 async def remove_admin_gc(message: Message):
     """Remove group chat admin - only owner and existing gc_admins can use this"""
-    # Check if user is owner or gc_admin
-    if message.from_user.id != config.ADMIN_ID and not db.is_admin(
-        message.from_user.id, "gc_admins"
-    ):
-        await message.answer(
-            "❌ This command is only available to the owner or group chat admins."
-        )
-        return
-
-    # Check if this is a group chat
-    if message.chat.type not in ["group", "supergroup"]:
-        await message.answer("❌ This command can only be used in group chats.")
-        return
-
     logger.info(
         lang.log_command_executed.format(
             command="remove_admin_gc", user_id=message.from_user.id
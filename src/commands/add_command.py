@@ -4,7 +4,7 @@ import os
 import re
 import ast
 import importlib.util
-import config
+import sys
 from typing import Set
 
 lang = get_lang()
@@ -220,13 +220,8 @@ def get_existing_commands() -> Set[str]:
     return existing
 
 
-@command("add_command")
+@command("add_command", role="owner")
 async def add_command(message: Message):
-    # Check if user is admin
-    if message.from_user.id != config.ADMIN_ID:
-        await message.answer("❌ This command is only available to administrators.")
-        return
-
     logger.info(
         lang.log_command_executed.format(
             command="add_command", user_id=message.from_user.id
@@ -305,8 +300,8 @@ async def add_command(message: Message):
 
         # Try to load and register the new command safely
         try:
-            f"src.commands.{filename[:-3]}"
-            spec = importlib.util.spec_from_file_location(filename[:-3], filepath)
+            module_name = f"src.commands.{filename[:-3]}"
+            spec = importlib.util.spec_from_file_location(module_name, filepath)
             module = importlib.util.module_from_spec(spec)
 
             # Execute in isolated environment
@@ -327,6 +322,12 @@ async def add_command(message: Message):
                         bot_instance.register_command(cmd_name, attr)
                         logger.info(f"Registered new command: {cmd_name}")
 
+                # Refresh cached help pages with the new command
+                from core.help_registry import help_registry
+
+                sys.modules[module_name] = module
+                help_registry.invalidate()
+
                 await message.answer(
                     f"✅ <b>Command Added Successfully!</b>\n\n"
                     f"📁 File: <code>{filename}</code>\n"
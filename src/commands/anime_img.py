@@ -33,7 +33,7 @@ def help():
     }
 
 
-@command("anime_img")
+@command("anime_img", cost="heavy")
 async def anime_img_command(message: Message):
     """Get anime images from Waifu.pics API"""
     logger.info(
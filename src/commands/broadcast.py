@@ -1,6 +1,5 @@
 from core import Message, command, logger, get_lang
-from core.database import db
-import asyncio
+from core.broadcast import PAUSED, RUNNING, broadcaster, describe_target, parse_target
 
 lang = get_lang()
 
@@ -8,89 +7,127 @@ lang = get_lang()
 def help():
     return {
         "name": "broadcast",
-        "version": "0.0.1",
+        "version": "0.2.0",
         "description": "Broadcast message to all users",
         "author": "Komihub",
-        "usage": "/broadcast [message]",
+        "usage": "/broadcast [filters] [message]\nFilters: role:admin active:7d lang:en chat:private, or chat:group / chat:channel\nReply to any message with /broadcast to copy it to all users (/broadcast forward to forward it)\n/broadcast_status\n/broadcast_pause [job]\n/broadcast_resume [job]\n/broadcast_cancel [job]",
     }
 
 
-@command("broadcast")
-async def broadcast(message: Message):
-    # Check if user is admin
-    if not db.is_admin(message.from_user.id):
-        await message.answer("❌ This command is only available to administrators.")
-        return
+def _job_id(message: Message, states):
+    """Job named in the command, or the latest job in one of the states"""
+    args = message.text.split()
+    if len(args) > 1:
+        return args[1]
+    jobs = broadcaster.list_jobs(states=states)
+    return jobs[-1]["id"] if jobs else None
+
 
+@command("broadcast", role="admin")
+async def broadcast(message: Message):
     logger.info(
         lang.log_command_executed.format(
             command="broadcast", user_id=message.from_user.id
         )
     )
 
-    # Get the message to broadcast
+    # Get the targeting filters, then the message to broadcast: the
+    # replied-to message, or the text
     args = message.text.split(" ", 1)
-    if len(args) < 2:
+    try:
+        target, rest = parse_target(args[1] if len(args) > 1 else "")
+    except ValueError as e:
+        await message.answer(f"❌ {e}")
+        return
+    source = None
+    text = None
+    if message.reply_to_message:
+        source = {
+            "chat_id": message.chat.id,
+            "message_id": message.reply_to_message.message_id,
+            "forward": rest.lower() == "forward",
+        }
+    elif not rest:
         await message.answer(
-            "Usage: /broadcast [message]\n\nSend a message that will be broadcasted to all users who have used the bot."
+            "Usage: /broadcast [message]\n\nSend a message that will be broadcasted to all users who have used the bot.\n"
+            "Reply to any message (photo, video, voice...) with /broadcast to copy it to every user, "
+            "or with /broadcast forward to forward it.\n\n"
+            "Put filters before the message to target a subset, e.g.\n"
+            "/broadcast role:admin active:7d lang:en chat:private Hello!\n"
+            "Use chat:group or chat:channel to post in the bot's groups or channels."
         )
         return
+    else:
+        text = rest
 
-    broadcast_message = args[1]
-
-    # Get all users from database
-    users_data = db.load_data("users")
-    user_ids = list(users_data.keys())
-
-    if not user_ids:
-        await message.answer("No users found in database.")
+    if not broadcaster.count_recipients(target):
+        await message.answer(f"No recipients found for {describe_target(target)}.")
         return
 
-    # Send initial status message
+    # Send initial status message; the job keeps editing it with progress
     status_msg = await message.answer(
-        f"📢 <b>Starting broadcast...</b>\n\nTarget users: {len(user_ids)}",
+        "📢 <b>Starting broadcast...</b>", parse_mode="HTML"
+    )
+    job = await broadcaster.start(
+        message.bot,
+        text,
+        created_by=message.from_user.id,
+        status_chat_id=status_msg.chat.id,
+        status_message_id=status_msg.message_id,
+        source=source,
+        target=target,
+    )
+    await message.answer(
+        f"Broadcast <code>{job['id']}</code> started for {job['total']} chats "
+        f"({describe_target(target)}).\n"
+        f"Use /broadcast_pause, /broadcast_resume or /broadcast_cancel to control it.",
         parse_mode="HTML",
     )
 
-    sent_count = 0
-    failed_count = 0
-
-    # Broadcast to all users
-    for user_id_str in user_ids:
-        try:
-            user_id = int(user_id_str)
-            await message.bot.send_message(
-                chat_id=user_id,
-                text=f"📢 <b>Important Message from Admin:</b>\n\n{broadcast_message}",
-                parse_mode="HTML",
-            )
-            sent_count += 1
-
-            # Update status every 10 messages to avoid flood
-            if sent_count % 10 == 0:
-                await status_msg.edit_text(
-                    f"📢 <b>Broadcasting...</b>\n\n"
-                    f"✅ Sent: {sent_count}\n"
-                    f"❌ Failed: {failed_count}\n"
-                    f"📊 Progress: {sent_count}/{len(user_ids)}",
-                    parse_mode="HTML",
-                )
-
-            # Small delay to avoid hitting rate limits
-            await asyncio.sleep(0.1)
-
-        except Exception as e:
-            failed_count += 1
-            logger.warning(f"Failed to send broadcast to user {user_id_str}: {e}")
-
-    # Final status update
-    await status_msg.edit_text(
-        f"✅ <b>Broadcast Complete!</b>\n\n"
-        f"📢 Message: {broadcast_message[:50]}{'...' if len(broadcast_message) > 50 else ''}\n"
-        f"✅ Successfully sent: {sent_count}\n"
-        f"❌ Failed: {failed_count}\n"
-        f"📊 Total users: {len(user_ids)}",
-        parse_mode="HTML",
+
+@command("broadcast_status", role="admin")
+async def broadcast_status(message: Message):
+    jobs = broadcaster.list_jobs()
+    if not jobs:
+        await message.answer("No active broadcasts.")
+        return
+
+    lines = [
+        f"<code>{job['id']}</code> {job['state']}: "
+        f"{job['sent'] + job['failed'] + job.get('unreachable', 0)}/{job['total']} "
+        f"(✅ {job['sent']}, ❌ {job['failed']}, 🚫 {job.get('unreachable', 0)})"
+        for job in jobs
+    ]
+    await message.answer(
+        "📢 <b>Active broadcasts</b>\n\n" + "\n".join(lines), parse_mode="HTML"
     )
 
-    logger.info(f"Broadcast completed: {sent_count} sent, {failed_count} failed")
+
+@command("broadcast_pause", role="admin")
+async def broadcast_pause(message: Message):
+    job_id = _job_id(message, states=(RUNNING,))
+    job = broadcaster.pause(job_id) if job_id else None
+    if not job:
+        await message.answer("No running broadcast to pause.")
+        return
+    await message.answer(f"⏸ Broadcast <code>{job_id}</code> paused.", parse_mode="HTML")
+
+
+@command("broadcast_resume", role="admin")
+async def broadcast_resume(message: Message):
+    job_id = _job_id(message, states=(PAUSED,))
+    job = broadcaster.resume(message.bot, job_id) if job_id else None
+    if not job:
+        await message.answer("No paused broadcast to resume.")
+        return
+    await message.answer(f"▶️ Broadcast <code>{job_id}</code> resumed.", parse_mode="HTML")
+
+
+@command("broadcast_cancel", role="admin")
+async def broadcast_cancel(message: Message):
+    job_id = _job_id(message, states=(RUNNING, PAUSED))
+    job = broadcaster.cancel(job_id) if job_id else None
+    if not job:
+        await message.answer("No active broadcast to cancel.")
+        return
+    await message.answer(f"🛑 Broadcast <code>{job_id}</code> cancelled.", parse_mode="HTML")
@@ -24,7 +24,7 @@ def help():
     }
 
 
-@command("dalle")
+@command("dalle", cost="heavy")
 async def dalle_command(message: Message):
     """Generate AI images from text prompt using DALL-E"""
     logger.info(
@@ -24,7 +24,7 @@ def help():
     }
 
 
-@command("emojimix")
+@command("emojimix", cost="heavy")
 async def emojimix_command(message: Message):
     """Mix two emojis into a combined image"""
     logger.info(
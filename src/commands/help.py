@@ -1,42 +1,22 @@
+import html
+
 from core import Message, command, logger, get_lang
-import os
-import importlib
+from core.help_registry import help_registry
 
 lang = get_lang()
 
 
-def load_all_commands():
-    commands_dir = "src/commands"
-    command_info = {}
-    for filename in os.listdir(commands_dir):
-        if filename.endswith(".py") and filename != "__init__.py":
-            module_name = f"src.commands.{filename[:-3]}"
-            try:
-                module = importlib.import_module(module_name)
-                if hasattr(module, "help") and callable(getattr(module, "help")):
-                    cmd_info = module.help()
-                    command_info[cmd_info["name"]] = cmd_info
-                    logger.debug(f"Loaded help info for command: {cmd_info['name']}")
-                else:
-                    logger.debug(f"No help function found for {module_name}, skipping")
-            except ImportError as e:
-                logger.error(f"Failed to load command module {module_name}: {e}")
-            except Exception as e:
-                logger.error(f"Unexpected error loading {module_name}: {e}")
-    return command_info
-
-
 def help():
     return {
         "name": "help",
-        "version": "0.0.2",
+        "version": "0.0.3",
         "description": "Get help for commands",
         "author": "Komihub",
-        "usage": "/help [command_name]",
+        "usage": "/help [command_name or page]",
     }
 
 
-@command("help")
+@command("help", cost="light", inline_reply=True)
 async def help_command(message: Message):
     try:
         logger.info(
@@ -44,39 +24,26 @@ async def help_command(message: Message):
                 command="help", user_id=message.from_user.id
             )
         )
-        commands_info = load_all_commands()
 
         args = message.text.split()
-        if len(args) > 1:
+        if len(args) > 1 and not args[1].isdigit():
             # Specific command help
             cmd_name = args[1].lstrip("/")
-            if cmd_name in commands_info:
-                info = commands_info[cmd_name]
-                help_text = (
-                    f"🛠 <b>Command:</b> /{info['name']}\n"
-                    f"📝 <i>{info['description']}</i>\n\n"
-                    f"<b>Usage:</b> <code>{info['usage']}</code>\n"
-                    f"<b>Author:</b> {info['author']}\n"
-                    f"<b>Version:</b> {info['version']}"
-                )
+            help_text = help_registry.render_command(cmd_name)
+            if help_text:
                 await message.answer(help_text, parse_mode="HTML")
             else:
                 await message.answer(
-                    f"⚠️ Command '<code>{cmd_name}</code>' not found.\nUse /help to see all available commands.",
+                    f"⚠️ {get_lang().help_command_not_found.format(command=html.escape(cmd_name))}",
                     parse_mode="HTML",
                 )
         else:
-            # General help (box-style)
-            box_top = "┌─🤖 Komihub Bot Commands─┐\n"
-            box_middle = ""
-            for cmd_name, info in sorted(commands_info.items()):
-                box_middle += f"│ /{cmd_name:<10} - {info['description']}\n"
-            box_bottom = "└─────────────────────────┘"
-
-            help_text = f"{box_top}{box_middle}{box_bottom}"
-
+            # General help (box-style), paginated
+            page = int(args[1]) if len(args) > 1 else 1
             await message.answer(
-                help_text, parse_mode="HTML", disable_web_page_preview=True
+                help_registry.render_page(page),
+                parse_mode="HTML",
+                disable_web_page_preview=True,
             )
     except Exception as e:
         logger.error(f"Unexpected error in help command: {e}")
@@ -24,7 +24,7 @@ def help():
     }
 
 
-@command("img_ai")
+@command("img_ai", cost="heavy")
 async def img_ai_command(message: Message):
     """Generate AI image from text prompt using Magic API"""
     logger.info(
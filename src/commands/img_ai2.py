@@ -24,7 +24,7 @@ def help():
     }
 
 
-@command("img_ai2")
+@command("img_ai2", cost="heavy")
 async def img_ai2_command(message: Message):
     """Generate AI image from text prompt using Animagine API with ratio support"""
     logger.info(
@@ -14,7 +14,7 @@ def help():
     }
 
 
-@command("ping")
+@command("ping", cost="light")
 async def ping(message: Message):
     start_time = time.time()
     sent_message = await message.answer("Pong!")
@@ -1,9 +1,13 @@
 from core import Message, command, logger, get_lang
 from core.optional_deps import get_qr_code_generators
+from core.lazy_import import register_warm_up
 import io
 
 lang = get_lang()
 
+# Import the QR libraries in the background once the bot is online
+register_warm_up(get_qr_code_generators)
+
 
 def help():
     return {
@@ -15,7 +19,7 @@ def help():
     }
 
 
-@command("qrcode")
+@command("qrcode", cost="heavy")
 async def qrcode_command(message: Message):
     logger.info(
         lang.log_command_executed.format(command="qrcode", user_id=message.from_user.id)
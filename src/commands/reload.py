@@ -1,7 +1,6 @@
 from core import Message, command, logger, get_lang
 from core.handler.commands import reload_commands
 from core.handler.events import reload_events
-import config
 
 lang = get_lang()
 
@@ -16,13 +15,8 @@ lang = get_lang()
 #     }
 
 
-@command("reload")
+@command("reload", role="owner")
 async def reload(message: Message):
-    # Check if user is admin
-    if message.from_user.id != config.ADMIN_ID:
-        await message.answer("❌ This command is only available to administrators.")
-        return
-
     logger.info(
         lang.log_command_executed.format(command="reload", user_id=message.from_user.id)
     )
@@ -34,16 +28,6 @@ async def reload(message: Message):
 
         total_reloaded = commands_reloaded + events_reloaded
 
-        # Also reload the help command to update command list
-        try:
-            import importlib
-
-            if "src.commands.help" in importlib.sys.modules:
-                importlib.reload(importlib.sys.modules["src.commands.help"])
-                logger.debug("Reloaded help command for updated command list")
-        except Exception as e:
-            logger.error(f"Failed to reload help command: {e}")
-
         await message.answer(
             f"🔄 <b>Command Reload Complete!</b>\n\n"
             f"🤖 Commands: {commands_reloaded}\n"
@@ -77,13 +77,8 @@ def monitor_process_health(process, timeout=10):
     return process.poll() is None, "Process still running"
 
 
-@command("restart")
+@command("restart", role="owner")
 async def restart(message: Message):
-    # Check if user is admin
-    if message.from_user.id != config.ADMIN_ID:
-        await message.answer("❌ This command is only available to administrators.")
-        return
-
     logger.info(
         lang.log_command_executed.format(
             command="restart", user_id=message.from_user.id
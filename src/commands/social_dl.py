@@ -1,7 +1,9 @@
-from core import Message, command, logger, get_lang
+from core import FSInputFile, Message, command, logger, get_lang
+from core.downloads import FileTooLargeError, download_service
+from core.media_cache import media_cache, normalize_url
 import re
-import yt_dlp
 import os
+import shutil
 import tempfile
 
 lang = get_lang()
@@ -56,7 +58,7 @@ def extract_video_id(url: str, platform: str) -> str:
     return None
 
 
-@command("social_dl")
+@command("social_dl", cost="heavy", cooldown=5)
 async def social_dl_command(message: Message):
     logger.info(
         lang.log_command_executed.format(
@@ -102,6 +104,25 @@ async def social_dl_command(message: Message):
         )
         return
 
+    # Content sent before is answered with its Telegram file_id, and a link
+    # being downloaded right now is sent by that request
+    cache_key = media_cache.key(platform, normalize_url(url), "best720")
+    if await media_cache.serve(message, cache_key):
+        return
+
+    async with media_cache.single_flight(cache_key):
+        # Each request downloads into its own directory
+        work_dir = tempfile.mkdtemp(prefix="social_dl-")
+        try:
+            await download_content(message, url, platform, cache_key, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+async def download_content(
+    message: Message, url: str, platform: str, cache_key: str, work_dir: str
+):
+    """Download a post into work_dir, send it and cache its file_id"""
     # Extract content ID
     content_id = extract_video_id(url, platform)
 
@@ -126,7 +147,7 @@ async def social_dl_command(message: Message):
         # yt-dlp options for social media download
         ydl_opts = {
             "format": "best[height<=720]",  # Limit quality to avoid large files
-            "outtmpl": os.path.join(tempfile.gettempdir(), "%(title)s.%(ext)s"),
+            "outtmpl": os.path.join(work_dir, "%(title)s.%(ext)s"),
             "quiet": True,
             "no_warnings": True,
         }
@@ -137,69 +158,60 @@ async def social_dl_command(message: Message):
                 {"extractor_args": {"instagram": {"api_hostname": "i.instagram.com"}}}
             )
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Extract info first
-            info = ydl.extract_info(url, download=False)
-
-            # Check file size (Telegram limit: 2GB for regular users)
-            if info.get("filesize", 0) > 2 * 1024 * 1024 * 1024:  # 2GB
-                await message.answer(
-                    "❌ File is too large (>2GB). Telegram limit exceeded."
-                )
-                return
-
-            # Download the content
-            ydl.download([url])
-
-            # Find the downloaded file
-            expected_filename = ydl.prepare_filename(info)
-            if not os.path.exists(expected_filename):
-                # Try to find the actual file
-                temp_dir = tempfile.gettempdir()
-                title = info.get("title", "").replace("/", "_").replace("\\", "_")
-                for file in os.listdir(temp_dir):
-                    if title in file and (
-                        file.endswith(
-                            (".mp4", ".webm", ".m4v", ".jpg", ".jpeg", ".png")
-                        )
-                    ):
-                        expected_filename = os.path.join(temp_dir, file)
-                        break
-
-            if os.path.exists(expected_filename):
-                file_size = os.path.getsize(expected_filename)
-                file_size_mb = file_size / (1024 * 1024)
-
-                # Send the file based on type
-                if expected_filename.endswith((".jpg", ".jpeg", ".png")):
-                    with open(expected_filename, "rb") as media_file:
-                        await message.answer_photo(
-                            photo=media_file,
-                            caption=f"📱 Downloaded from {platform_names[platform]}\n📄 {info.get('title', 'Unknown')}\n📊 Size: {file_size_mb:.1f} MB",
-                        )
-                elif expected_filename.endswith((".mp4", ".webm", ".m4v")):
-                    with open(expected_filename, "rb") as media_file:
-                        await message.answer_video(
-                            video=media_file,
-                            caption=f"📱 Downloaded from {platform_names[platform]}\n🎬 {info.get('title', 'Unknown')}\n📊 Size: {file_size_mb:.1f} MB",
-                            duration=info.get("duration", 0),
-                        )
-                else:
-                    # Send as document for other formats
-                    with open(expected_filename, "rb") as media_file:
-                        await message.answer_document(
-                            document=media_file,
-                            caption=f"📱 Downloaded from {platform_names[platform]}\n📄 {info.get('title', 'Unknown')}\n📊 Size: {file_size_mb:.1f} MB",
-                        )
-
-                # Clean up
-                os.remove(expected_filename)
-                logger.info(
-                    f"Downloaded and sent {platform} content: {info.get('title', 'Unknown')}"
-                )
+        # Extract, download and convert in the download pool
+        info, expected_filename = await download_service.download(
+            url,
+            ydl_opts,
+            max_filesize=2 * 1024 * 1024 * 1024,
+        )
+
+        # Find the downloaded file if it was renamed
+        if not os.path.exists(expected_filename):
+            # Try to find the actual file
+            for file in os.listdir(work_dir):
+                if file.endswith((".mp4", ".webm", ".m4v", ".jpg", ".jpeg", ".png")):
+                    expected_filename = os.path.join(work_dir, file)
+                    break
+
+        if os.path.exists(expected_filename):
+            file_size = os.path.getsize(expected_filename)
+            file_size_mb = file_size / (1024 * 1024)
+
+            # Send the file based on type
+            media_file = FSInputFile(expected_filename)
+            if expected_filename.endswith((".jpg", ".jpeg", ".png")):
+                params = {
+                    "caption": f"📱 Downloaded from {platform_names[platform]}\n📄 {info.get('title', 'Unknown')}\n📊 Size: {file_size_mb:.1f} MB",
+                }
+                sent = await message.answer_photo(photo=media_file, **params)
+            elif expected_filename.endswith((".mp4", ".webm", ".m4v")):
+                params = {
+                    "caption": f"📱 Downloaded from {platform_names[platform]}\n🎬 {info.get('title', 'Unknown')}\n📊 Size: {file_size_mb:.1f} MB",
+                    "duration": info.get("duration", 0),
+                }
+                sent = await message.answer_video(video=media_file, **params)
             else:
-                await message.answer("❌ Failed to find downloaded file.")
+                # Send as document for other formats
+                params = {
+                    "caption": f"📱 Downloaded from {platform_names[platform]}\n📄 {info.get('title', 'Unknown')}\n📊 Size: {file_size_mb:.1f} MB",
+                }
+                sent = await message.answer_document(document=media_file, **params)
+
+            # Cache the file_id for repeat requests
+            media_cache.remember(cache_key, sent, **params)
+
+            # Clean up
+            os.remove(expected_filename)
+            logger.info(
+                f"Downloaded and sent {platform} content: {info.get('title', 'Unknown')}"
+            )
+        else:
+            await message.answer("❌ Failed to find downloaded file.")
 
+    except FileTooLargeError:
+        await message.answer(
+            "❌ File is too large (>2GB). Telegram limit exceeded."
+        )
     except Exception as e:
         logger.error(f"Social media download error: {e}")
         await message.answer(
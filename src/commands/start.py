@@ -17,7 +17,7 @@ def help():
     }
 
 
-@command("start")
+@command("start", cost="light", inline_reply=True)
 async def start(message: Message):
     logger.info(
         lang.log_command_executed.format(command="start", user_id=message.from_user.id)
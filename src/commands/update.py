@@ -1,6 +1,7 @@
 """Update command for version checking and auto-updates"""
 
 from core import Message, command, logger, get_lang
+import config
 
 lang = get_lang()
 
@@ -15,20 +16,12 @@ def help():
     }
 
 
-@command("update")
+@command("update", role="owner")
 async def update_command(message: Message):
     logger.info(
         lang.log_command_executed.format(command="update", user_id=message.from_user.id)
     )
 
-    # Check if user is admin
-    from core import bot
-
-    bot_instance = bot.get_bot()
-    if message.from_user.id != bot_instance.config.ADMIN_ID:
-        await message.answer("❌ This command is only available to admins.")
-        return
-
     args = message.text.split()
 
     if len(args) < 2:
@@ -38,8 +31,8 @@ async def update_command(message: Message):
             "/update check - Check for updates\n"
             "/update update - Perform manual update\n"
             "/update status - Show version status\n"
-            f"Auto-update: {'✅ Enabled' if bot_instance.config.AUTO_UPDATE else '❌ Disabled'}\n"
-            f"GitHub: {bot_instance.config.GITHUB_REPO}",
+            f"Auto-update: {'✅ Enabled' if config.AUTO_UPDATE else '❌ Disabled'}\n"
+            f"GitHub: {config.GITHUB_REPO}",
             parse_mode="HTML",
         )
         return
@@ -13,7 +13,7 @@ def help():
     }
 
 
-@command("upload_limit")
+@command("upload_limit", cost="light", inline_reply=True)
 async def upload_limit_command(message: Message):
     logger.info(
         lang.log_command_executed.format(
@@ -1,18 +1,26 @@
 import asyncio
-from core import Message, command, logger, get_lang
+from core import FSInputFile, Message, command, logger, get_lang
+from core.downloads import FileTooLargeError, download_service
+from core.media_cache import media_cache
+from core.ratelimit import rate_limiter
+from core.state_store import search_state
+from core.youtube import youtube_search
+from core.bot import bot_instance
 import re
-import yt_dlp
 import os
+import shutil
 import tempfile
 import config
-import requests
 
 lang = get_lang()
 
 
 def sync_progress_hook(d, progress_msg, message):
     """Sync wrapper for progress hook"""
+    key = (progress_msg.chat.id, progress_msg.message_id)
     if d["status"] == "downloading":
+        if not rate_limiter.should_update_progress(key):
+            return
         try:
             percent = d.get("_percent_str", "0%").strip()
             speed = d.get("_speed_str", "N/A")
@@ -32,6 +40,7 @@ def sync_progress_hook(d, progress_msg, message):
         except Exception as e:
             logger.error(f"Progress update error: {e}")
     elif d["status"] == "finished":
+        rate_limiter.should_update_progress(key, final=True)
         try:
 
             def finish_progress():
@@ -74,86 +83,7 @@ def extract_youtube_id(url: str) -> str:
     return None
 
 
-def format_duration(seconds: int) -> str:
-    """Format seconds into MM:SS"""
-    minutes = seconds // 60
-    seconds = seconds % 60
-    return f"{minutes}:{seconds:02d}"
-
-
-def search_youtube(query: str, api_key: str, max_results: int = 5):
-    """Search YouTube using YouTube Data API v3"""
-    search_url = "https://www.googleapis.com/youtube/v3/search"
-    params = {
-        "part": "snippet",
-        "q": query,
-        "type": "video",
-        "maxResults": max_results,
-        "key": api_key,
-        "videoCategoryId": "10",  # Music category
-    }
-
-    try:
-        response = requests.get(search_url, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        results = []
-        for item in data.get("items", []):
-            video_id = item["id"]["videoId"]
-            snippet = item["snippet"]
-
-            # Get video details for duration
-            details_url = "https://www.googleapis.com/youtube/v3/videos"
-            details_params = {
-                "part": "contentDetails,statistics",
-                "id": video_id,
-                "key": api_key,
-            }
-
-            details_response = requests.get(details_url, params=details_params)
-            details_response.raise_for_status()
-            details_data = details_response.json()
-
-            if details_data.get("items"):
-                video_details = details_data["items"][0]
-                duration = video_details["contentDetails"]["duration"]
-                view_count = video_details["statistics"].get("viewCount", "0")
-
-                # Parse ISO 8601 duration (PT4M13S -> 4:13)
-                import re
-
-                duration_match = re.match(
-                    r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?", duration
-                )
-                if duration_match:
-                    hours = int(duration_match.group(1) or 0)
-                    minutes = int(duration_match.group(2) or 0)
-                    seconds = int(duration_match.group(3) or 0)
-                    total_seconds = hours * 3600 + minutes * 60 + seconds
-                    formatted_duration = format_duration(total_seconds)
-                else:
-                    formatted_duration = "Unknown"
-
-                results.append(
-                    {
-                        "title": snippet["title"],
-                        "channel": snippet["channelTitle"],
-                        "duration": formatted_duration,
-                        "views": f"{int(view_count):,}",
-                        "url": f"https://youtu.be/{video_id}",
-                        "video_id": video_id,
-                    }
-                )
-
-        return results
-
-    except Exception as e:
-        logger.error(f"YouTube API search error: {e}")
-        return []
-
-
-@command("song")
+@command("song", cooldown=5)
 async def song_command(message: Message):
     """Quick song search and selection command"""
     logger.info(
@@ -173,13 +103,13 @@ async def song_command(message: Message):
         await message.answer(f"🔍 Searching for: <b>{query}</b>", parse_mode="HTML")
 
         # Use YouTube API for search
-        if not hasattr(config, "YT_API_KEY") or not config.YT_API_KEY:
+        if not config.YOUTUBE_API_KEY:
             await message.answer(
-                "❌ YouTube API key not configured. Please set YT_API_KEY in config.py"
+                "❌ YouTube API key not configured. Please set YOUTUBE_API_KEY in .env or config.json"
             )
             return
 
-        search_results = search_youtube(query, config.YT_API_KEY)
+        search_results = await youtube_search.search(query, config.YOUTUBE_API_KEY)
 
         if not search_results:
             await message.answer("❌ No results found for your search query.")
@@ -195,20 +125,15 @@ async def song_command(message: Message):
 
         response += "<i>Reply with 1-5 to download the song</i>"
 
-        # Store search results for reply handling
-        import time
-
-        search_data = {
-            "user_id": message.from_user.id,
-            "results": search_results,
-            "timestamp": time.time(),
-            "command": "song",
-        }
-
-        # Store in cache
-        if not hasattr(song_command, "cache"):
-            song_command.cache = {}
-        song_command.cache[message.from_user.id] = search_data
+        # Store search results for reply handling; they expire after 10 minutes
+        search_state.set(
+            message.from_user.id,
+            {
+                "user_id": message.from_user.id,
+                "results": search_results,
+                "command": "song",
+            },
+        )
 
         await message.answer(response, parse_mode="HTML")
 
@@ -217,7 +142,7 @@ async def song_command(message: Message):
         await message.answer("❌ Failed to search for songs. Please try again.")
 
 
-@command("yt_music")
+@command("yt_music", cooldown=5)
 async def yt_music_command(message: Message):
     logger.info(
         lang.log_command_executed.format(
@@ -246,88 +171,17 @@ async def yt_music_command(message: Message):
     # Check if it's a YouTube URL
     video_id = extract_youtube_id(query)
     if video_id:
-        # Handle direct download
-        progress_msg = await message.answer(
-            "🎵 Downloading audio from YouTube...\n⏳ Progress: 0%", parse_mode="HTML"
-        )
-
-        try:
-            # yt-dlp options for audio extraction
-            ydl_opts = {
-                "format": "bestaudio/best",
-                "postprocessors": [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                        "preferredquality": "192",
-                    }
-                ],
-                "outtmpl": os.path.join(tempfile.gettempdir(), "%(title)s.%(ext)s"),
-                "quiet": True,
-                "no_warnings": True,
-                "progress_hooks": [
-                    lambda d: sync_progress_hook(d, progress_msg, message)
-                ],
-            }
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Extract info first
-                info = ydl.extract_info(f"https://youtu.be/{video_id}", download=False)
-
-                # Check file size (Telegram limit: 50MB for bots, 2GB for regular users, 4GB for premium)
-                filesize = info.get("filesize", 0)
-                if filesize > 50 * 1024 * 1024:  # 50MB for bots
-                    await message.answer(
-                        "❌ Audio file is too large (>50MB). Telegram bot limit exceeded."
-                    )
-                    return
-
-                # Download the audio
-                ydl.download([f"https://youtu.be/{video_id}"])
-
-                # Find the downloaded file
-                expected_filename = (
-                    ydl.prepare_filename(info)
-                    .replace(".webm", ".mp3")
-                    .replace(".m4a", ".mp3")
-                )
-                if not os.path.exists(expected_filename):
-                    # Try to find the actual file
-                    temp_dir = tempfile.gettempdir()
-                    for file in os.listdir(temp_dir):
-                        if file.endswith(".mp3") and info["title"] in file:
-                            expected_filename = os.path.join(temp_dir, file)
-                            break
-
-                if os.path.exists(expected_filename):
-                    # Delete progress message
-                    try:
-                        await progress_msg.delete()
-                    except:
-                        pass
-
-                    # Send the audio file
-                    with open(expected_filename, "rb") as audio_file:
-                        await message.answer_audio(
-                            audio=audio_file,
-                            title=info.get("title", "YouTube Audio"),
-                            performer=info.get("uploader", "Unknown"),
-                            duration=info.get("duration", 0),
-                            caption=f"🎵 Downloaded from YouTube\n📹 {info.get('title', 'Unknown')}\n👤 {info.get('uploader', 'Unknown')}",
-                        )
-
-                    # Clean up
-                    os.remove(expected_filename)
-                    logger.info(
-                        f"Downloaded and sent YouTube audio: {info.get('title', 'Unknown')}"
-                    )
-                else:
-                    await message.answer("❌ Failed to find downloaded audio file.")
-
-        except Exception as e:
-            logger.error(f"YouTube download error: {e}")
-            await message.answer(f"❌ Failed to download audio: {str(e)}")
+        # Tracks sent before, or being downloaded right now, need no heavy slot
+        cache_key = media_cache.key("youtube", video_id, "mp3-192")
+        if await media_cache.serve(message, cache_key):
+            return
 
+        # Downloads take a while; run it in the heavy task pool so the update
+        # worker is free for other chats in the meantime
+        if not bot_instance.heavy_tasks.submit(
+            "yt_music", lambda: send_track(message, video_id)
+        ):
+            await message.answer(f"⏳ {lang.heavy_tasks_busy}")
         return
 
     # Handle search
@@ -335,13 +189,13 @@ async def yt_music_command(message: Message):
         await message.answer(f"🔍 Searching for: <b>{query}</b>", parse_mode="HTML")
 
         # Use YouTube API for real search
-        if not hasattr(config, "YT_API_KEY") or not config.YT_API_KEY:
+        if not config.YOUTUBE_API_KEY:
             await message.answer(
-                "❌ YouTube API key not configured. Please set YT_API_KEY in config.py"
+                "❌ YouTube API key not configured. Please set YOUTUBE_API_KEY in .env or config.json"
             )
             return
 
-        search_results = search_youtube(query, config.YT_API_KEY)
+        search_results = await youtube_search.search(query, config.YOUTUBE_API_KEY)
 
         if not search_results:
             await message.answer("❌ No results found for your search query.")
@@ -358,23 +212,103 @@ async def yt_music_command(message: Message):
 
         response += "<i>Reply with 1-5 to download, or use /yt_music URL</i>"
 
-        # Store search results for reply handling
-        import time
-
-        search_data = {
-            "user_id": message.from_user.id,
-            "results": search_results,
-            "timestamp": time.time(),
-            "command": "yt_music",
-        }
-
-        # Store in cache
-        if not hasattr(yt_music_command, "cache"):
-            yt_music_command.cache = {}
-        yt_music_command.cache[message.from_user.id] = search_data
+        # Store search results for reply handling; they expire after 10 minutes
+        search_state.set(
+            message.from_user.id,
+            {
+                "user_id": message.from_user.id,
+                "results": search_results,
+                "command": "yt_music",
+            },
+        )
 
         await message.answer(response, parse_mode="HTML")
 
     except Exception as e:
         logger.error(f"YouTube search error: {e}")
         await message.answer("❌ Failed to search YouTube. Please try again.")
+
+
+async def send_track(message: Message, video_id: str):
+    """Send a YouTube video's audio, downloading it if needed"""
+    cache_key = media_cache.key("youtube", video_id, "mp3-192")
+    # Requests queued behind the first one for this track join its download
+    if await media_cache.serve(message, cache_key):
+        return
+    async with media_cache.single_flight(cache_key):
+        # Each request downloads into its own directory
+        work_dir = tempfile.mkdtemp(prefix="yt_music-")
+
+        # Handle direct download
+        progress_msg = await message.answer(
+            "🎵 Downloading audio from YouTube...\n⏳ Progress: 0%", parse_mode="HTML"
+        )
+
+        try:
+            # yt-dlp options for audio extraction
+            ydl_opts = {
+                "format": "bestaudio/best",
+                "postprocessors": [
+                    {
+                        "key": "FFmpegExtractAudio",
+                        "preferredcodec": "mp3",
+                        "preferredquality": "192",
+                    }
+                ],
+                "outtmpl": os.path.join(work_dir, "%(id)s.%(ext)s"),
+                "quiet": True,
+                "no_warnings": True,
+            }
+
+            # Extract, download and convert in the download pool
+            info, expected_filename = await download_service.download(
+                f"https://youtu.be/{video_id}",
+                ydl_opts,
+                progress=lambda d: sync_progress_hook(d, progress_msg, message),
+                max_filesize=50 * 1024 * 1024,
+            )
+
+            # Find the downloaded file if it was renamed
+            if not os.path.exists(expected_filename):
+                # Try to find the actual file
+                for file in os.listdir(work_dir):
+                    if file.endswith(".mp3"):
+                        expected_filename = os.path.join(work_dir, file)
+                        break
+
+            if os.path.exists(expected_filename):
+                # Delete progress message
+                try:
+                    await progress_msg.delete()
+                except:
+                    pass
+
+                # Send the audio file and cache its file_id for repeat requests
+                audio_params = {
+                    "title": info.get("title", "YouTube Audio"),
+                    "performer": info.get("uploader", "Unknown"),
+                    "duration": info.get("duration", 0),
+                    "caption": f"🎵 Downloaded from YouTube\n📹 {info.get('title', 'Unknown')}\n👤 {info.get('uploader', 'Unknown')}",
+                }
+                sent = await message.answer_audio(
+                    audio=FSInputFile(expected_filename), **audio_params
+                )
+                media_cache.remember(cache_key, sent, **audio_params)
+
+                # Clean up
+                os.remove(expected_filename)
+                logger.info(
+                    f"Downloaded and sent YouTube audio: {info.get('title', 'Unknown')}"
+                )
+            else:
+                await message.answer("❌ Failed to find downloaded audio file.")
+
+        except FileTooLargeError:
+            await message.answer(
+                "❌ Audio file is too large (>50MB). Telegram bot limit exceeded."
+            )
+        except Exception as e:
+            logger.error(f"YouTube download error: {e}")
+            await message.answer(f"❌ Failed to download audio: {str(e)}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
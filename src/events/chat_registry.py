@@ -0,0 +1,30 @@
+from aiogram.types import ChatMemberUpdated
+from core import logger
+from core.database import db
+
+
+async def on_bot_membership_change(update: ChatMemberUpdated):
+    """Keep the chat registry in sync when the bot is added, promoted or removed"""
+    chat = update.chat
+    if chat.type == "private":
+        return
+
+    status = update.new_chat_member.status
+    member_count = None
+    if status in ("member", "administrator", "creator"):
+        try:
+            member_count = await update.bot.get_chat_member_count(chat.id)
+        except Exception as e:
+            logger.warning(f"Could not get member count of chat {chat.id}: {e}")
+
+    updates = {"type": chat.type, "title": chat.title, "status": status}
+    if member_count is not None:
+        updates["member_count"] = member_count
+    db.update_chat(chat.id, **updates)
+    logger.info(f"Bot status in {chat.type} {chat.id} ({chat.title}) is now {status}")
+
+
+# Register events
+from core.bot import bot_instance
+
+bot_instance.register_event("my_chat_member", on_bot_membership_change)
@@ -32,6 +32,8 @@ async def on_user_join(chat_member: ChatMemberUpdated):
         }
         db.add_user(user_id, user_data)
 
+        db.adjust_chat_members(chat_id, 1)
+
         # Log the join event
         logger.info(f"User {user_id} joined chat {chat_id}")
 
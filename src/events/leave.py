@@ -27,6 +27,8 @@ async def on_user_left(chat_member: ChatMemberUpdated):
         # Update user data in database
         db.update_user(user_id, last_seen=None)  # Mark as left
 
+        db.adjust_chat_members(chat_id, -1)
+
         # Log the leave event
         logger.info(f"User {user_id} left chat {chat_id}")
 
@@ -1,7 +1,11 @@
 import asyncio
 from core import logger, get_lang, FSInputFile, Message
-import yt_dlp
+from core.downloads import FileTooLargeError, download_service
+from core.media_cache import media_cache
+from core.ratelimit import rate_limiter
+from core.state_store import search_state
 import os
+import shutil
 import tempfile
 
 lang = get_lang()
@@ -9,7 +13,10 @@ lang = get_lang()
 
 def sync_progress_hook(d, progress_msg, message):
     """Sync wrapper for progress hook"""
+    key = (progress_msg.chat.id, progress_msg.message_id)
     if d["status"] == "downloading":
+        if not rate_limiter.should_update_progress(key):
+            return
         try:
             percent = d.get("_percent_str", "0%").strip()
             speed = d.get("_speed_str", "N/A")
@@ -29,6 +36,7 @@ def sync_progress_hook(d, progress_msg, message):
         except Exception as e:
             logger.error(f"Progress update error: {e}")
     elif d["status"] == "finished":
+        rate_limiter.should_update_progress(key, final=True)
         try:
 
             def finish_progress():
@@ -47,6 +55,17 @@ def sync_progress_hook(d, progress_msg, message):
             logger.error(f"Progress finish error: {e}")
 
 
+async def clear_search_results(message: Message):
+    """Forget the user's search and unsend the results message"""
+    search_state.pop(message.from_user.id)
+
+    # Auto-unsend the search results message
+    try:
+        await message.reply_to_message.delete()
+    except Exception as e:
+        logger.error(f"Failed to auto-unsend search results: {e}")
+
+
 async def handle_song_reply(message: Message):
     """Handle replies to song search results"""
     if not message.reply_to_message or not message.text:
@@ -67,37 +86,11 @@ async def handle_song_reply(message: Message):
     except ValueError:
         return
 
-    # Check if user has cached search results
-    search_data = None
-
-    # Import here to avoid circular imports
-    from src.commands.yt_music import yt_music_command, song_command
-
-    # Check yt_music cache
-    if (
-        hasattr(yt_music_command, "cache")
-        and message.from_user.id in yt_music_command.cache
-    ):
-        search_data = yt_music_command.cache[message.from_user.id]
-
-    # Check song cache
-    if (
-        not search_data
-        and hasattr(song_command, "cache")
-        and message.from_user.id in song_command.cache
-    ):
-        search_data = song_command.cache[message.from_user.id]
-
+    # Check if user has recent search results (they expire after 10 minutes)
+    search_data = search_state.get(message.from_user.id)
     if not search_data:
         return
 
-    # Check if reply is recent (within 10 minutes)
-    import datetime
-
-    current_time = datetime.datetime.now().timestamp()
-    if current_time - search_data["timestamp"] > 600:
-        return
-
     results = search_data["results"]
     if selection > len(results):
         await message.answer("❌ Invalid selection number.")
@@ -105,55 +98,66 @@ async def handle_song_reply(message: Message):
 
     selected_video = results[selection - 1]
 
-    progress_msg = await message.answer(
-        f"🎵 Downloading: <b>{selected_video['title']}</b>\n⏳ Progress: 0%",
-        parse_mode="HTML",
-    )
+    # Tracks sent before, or being downloaded right now, need no heavy slot
+    cache_key = media_cache.key("youtube", selected_video["video_id"], "mp3-192")
+    if await media_cache.serve(message, cache_key):
+        await clear_search_results(message)
+        return
 
-    try:
-        # yt-dlp options for audio extraction
-        ydl_opts = {
-            "format": "bestaudio/best",
-            "postprocessors": [
-                {
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "192",
-                }
-            ],
-            "outtmpl": os.path.join(tempfile.gettempdir(), "%(title)s.%(ext)s"),
-            "quiet": True,
-            "no_warnings": True,
-            "progress_hooks": [lambda d: sync_progress_hook(d, progress_msg, message)],
-        }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Extract info first
-            info = ydl.extract_info(selected_video["url"], download=False)
-
-            # Check file size (Telegram limit: 50MB for bots, 2GB for regular users, 4GB for premium)
-            filesize = info.get("filesize", 0)
-            if filesize > 50 * 1024 * 1024:  # 50MB for bots
-                await message.answer(
-                    "❌ Audio file is too large (>50MB). Telegram bot limit exceeded."
-                )
-                return
+    # Downloads take a while; run it in the heavy task pool so the update
+    # worker is free for other chats in the meantime
+    if not bot_instance.heavy_tasks.submit(
+        "song_reply", lambda: send_selection(message, selected_video)
+    ):
+        await message.answer(f"⏳ {lang.heavy_tasks_busy}")
 
-            # Download the audio
-            ydl.download([selected_video["url"]])
 
-            # Find the downloaded file
-            expected_filename = (
-                ydl.prepare_filename(info)
-                .replace(".webm", ".mp3")
-                .replace(".m4a", ".mp3")
+async def send_selection(message: Message, selected_video: dict):
+    """Send the chosen search result as audio, downloading it if needed"""
+    cache_key = media_cache.key("youtube", selected_video["video_id"], "mp3-192")
+    # Requests queued behind the first one for this track join its download
+    if await media_cache.serve(message, cache_key):
+        await clear_search_results(message)
+        return
+    async with media_cache.single_flight(cache_key):
+        # Each request downloads into its own directory
+        work_dir = tempfile.mkdtemp(prefix="song-")
+
+        progress_msg = await message.answer(
+            f"🎵 Downloading: <b>{selected_video['title']}</b>\n⏳ Progress: 0%",
+            parse_mode="HTML",
+        )
+
+        try:
+            # yt-dlp options for audio extraction
+            ydl_opts = {
+                "format": "bestaudio/best",
+                "postprocessors": [
+                    {
+                        "key": "FFmpegExtractAudio",
+                        "preferredcodec": "mp3",
+                        "preferredquality": "192",
+                    }
+                ],
+                "outtmpl": os.path.join(work_dir, "%(id)s.%(ext)s"),
+                "quiet": True,
+                "no_warnings": True,
+            }
+
+            # Extract, download and convert in the download pool
+            info, expected_filename = await download_service.download(
+                selected_video["url"],
+                ydl_opts,
+                progress=lambda d: sync_progress_hook(d, progress_msg, message),
+                max_filesize=50 * 1024 * 1024,
             )
+
+            # Find the downloaded file if it was renamed
             if not os.path.exists(expected_filename):
                 # Try to find the actual file
-                temp_dir = tempfile.gettempdir()
-                for file in os.listdir(temp_dir):
-                    if file.endswith(".mp3") and info["title"] in file:
-                        expected_filename = os.path.join(temp_dir, file)
+                for file in os.listdir(work_dir):
+                    if file.endswith(".mp3"):
+                        expected_filename = os.path.join(work_dir, file)
                         break
 
             if os.path.exists(expected_filename):
@@ -163,15 +167,17 @@ async def handle_song_reply(message: Message):
                 except:
                     pass
 
-                # Send the audio file
-                audio_file = FSInputFile(expected_filename)
-                await message.answer_audio(
-                    audio=audio_file,
-                    title=info.get("title", "YouTube Audio"),
-                    performer=info.get("uploader", "Unknown"),
-                    duration=info.get("duration", 0),
-                    caption=f"🎵 Downloaded from YouTube\n📹 {info.get('title', 'Unknown')}\n👤 {info.get('uploader', 'Unknown')}\n🔗 {selected_video['url']}",
+                # Send the audio file and cache its file_id for repeat requests
+                audio_params = {
+                    "title": info.get("title", "YouTube Audio"),
+                    "performer": info.get("uploader", "Unknown"),
+                    "duration": info.get("duration", 0),
+                    "caption": f"🎵 Downloaded from YouTube\n📹 {info.get('title', 'Unknown')}\n👤 {info.get('uploader', 'Unknown')}\n🔗 {selected_video['url']}",
+                }
+                sent = await message.answer_audio(
+                    audio=FSInputFile(expected_filename), **audio_params
                 )
+                media_cache.remember(cache_key, sent, **audio_params)
 
                 # Clean up
                 os.remove(expected_filename)
@@ -180,23 +186,20 @@ async def handle_song_reply(message: Message):
                 )
 
                 # Clear cache after successful download
-                if hasattr(yt_music_command, "cache"):
-                    yt_music_command.cache.pop(message.from_user.id, None)
-                if hasattr(song_command, "cache"):
-                    song_command.cache.pop(message.from_user.id, None)
-
-                # Auto-unsend the search results message
-                try:
-                    await message.reply_to_message.delete()
-                except Exception as e:
-                    logger.error(f"Failed to auto-unsend search results: {e}")
+                await clear_search_results(message)
 
             else:
                 await message.answer("❌ Failed to find downloaded audio file.")
 
-    except Exception as e:
-        logger.error(f"YouTube download error: {e}")
-        await message.answer(f"❌ Failed to download audio: {str(e)}")
+        except FileTooLargeError:
+            await message.answer(
+                "❌ Audio file is too large (>50MB). Telegram bot limit exceeded."
+            )
+        except Exception as e:
+            logger.error(f"YouTube download error: {e}")
+            await message.answer(f"❌ Failed to download audio: {str(e)}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
 
 
 # Register the event
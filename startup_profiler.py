@@ -0,0 +1,136 @@
+"""
+Opt-in startup profiler for the KOMIHUB Bot
+Records wall time and memory for each startup stage and writes a report
+
+Enable with PROFILE_STARTUP=true or the --profile-startup flag. Memory is
+measured as RSS growth per stage; set PROFILE_STARTUP_TRACEMALLOC=true to also
+trace Python allocations (much slower, so wall times are inflated). This
+module only uses the standard library at import time so it can be loaded
+before config and core, which are themselves profiled.
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def _enabled_from_env() -> bool:
+    return (
+        os.getenv("PROFILE_STARTUP", "false").lower() == "true"
+        or "--profile-startup" in sys.argv
+    )
+
+
+class StartupProfiler:
+    """Collect per-stage timings during startup"""
+
+    def __init__(
+        self, enabled: bool = False, output_dir: str = "logs", trace_alloc: bool = False
+    ):
+        self.enabled = enabled
+        self.trace_alloc = enabled and trace_alloc
+        self.output_dir = output_dir
+        self.stages: List[Dict[str, Any]] = []
+        self._depth = 0
+        self._started = time.perf_counter()
+        self._process = None
+        self._reported = False
+
+        if self.trace_alloc:
+            tracemalloc.start()
+
+    def _rss(self) -> Optional[int]:
+        if self._process is None:
+            try:
+                import psutil
+
+                self._process = psutil.Process()
+            except ImportError:
+                self._process = False
+        return self._process.memory_info().rss if self._process else None
+
+    def stage(self, name: str, category: str = "startup"):
+        """Context manager timing one startup stage (no-op when disabled)"""
+        if not self.enabled:
+            return nullcontext()
+        return self._stage(name, category)
+
+    @contextmanager
+    def _stage(self, name: str, category: str):
+        record = {"name": name, "category": category, "depth": self._depth}
+        self.stages.append(record)
+        rss_before = self._rss()
+        traced_before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            yield record
+        finally:
+            self._depth -= 1
+            record["wall_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            if self.trace_alloc:
+                traced_after, _ = tracemalloc.get_traced_memory()
+                record["alloc_kb"] = round((traced_after - traced_before) / 1024, 1)
+            rss_after = self._rss()
+            if rss_before is not None and rss_after is not None:
+                record["rss_kb"] = round((rss_after - rss_before) / 1024, 1)
+
+    def report(self) -> Optional[Dict[str, Any]]:
+        """Write the sorted text report and the JSON file, once"""
+        if not self.enabled or self._reported:
+            return None
+        self._reported = True
+
+        rss = self._rss()
+        data = {
+            "generated_at": datetime.now().isoformat(),
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "rss_kb": round(rss / 1024, 1) if rss is not None else None,
+            "stages": self.stages,
+        }
+        summary = f"Total until ready: {data['total_ms']:.1f} ms"
+        if data["rss_kb"] is not None:
+            summary += f", RSS: {data['rss_kb'] / 1024:.1f} MB"
+        if self.trace_alloc:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            data["peak_traced_kb"] = round(peak / 1024, 1)
+            summary += f", peak traced: {data['peak_traced_kb'] / 1024:.1f} MB"
+
+        lines = [
+            f"Startup profile ({data['generated_at']})",
+            summary,
+            "",
+            f"{'wall ms':>10} {'alloc KB':>10} {'rss KB':>10}  {'category':<10} stage",
+        ]
+        for stage in sorted(self.stages, key=lambda s: s["wall_ms"], reverse=True):
+            alloc, rss = stage.get("alloc_kb", "-"), stage.get("rss_kb", "-")
+            lines.append(
+                f"{stage['wall_ms']:>10.1f} {alloc:>10} {rss:>10}  {stage['category']:<10} "
+                f"{'  ' * stage['depth']}{stage['name']}"
+            )
+
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            text_path = os.path.join(self.output_dir, "startup_profile.txt")
+            json_path = os.path.join(self.output_dir, "startup_profile.json")
+            with open(text_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            print(f"📊 Startup profile written to {text_path} and {json_path}")
+        except OSError as e:
+            print(f"Warning: Could not write startup profile: {e}")
+        return data
+
+
+# Global profiler instance
+profiler = StartupProfiler(
+    enabled=_enabled_from_env(),
+    output_dir=os.getenv("PROFILE_STARTUP_DIR", "logs"),
+    trace_alloc=os.getenv("PROFILE_STARTUP_TRACEMALLOC", "false").lower() == "true",
+)
@@ -2,14 +2,19 @@
 FastAPI web server for hosting the bot on web services like Render
 """
 import os
+import hmac
+import asyncio
 import json
 import logging
 from contextlib import asynccontextmanager
+from urllib.parse import urlencode
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+from startup_profiler import profiler
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,6 +25,12 @@ logger = logging.getLogger(__name__)
 # Global bot instance
 bot_instance = None
 
+# Log one in this many received updates at INFO (all of them at DEBUG)
+UPDATE_LOG_SAMPLE_RATE = 100
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# How long the webhook waits for a cheap command's reply to answer it inline
+INLINE_REPLY_TIMEOUT = 1.0
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
@@ -30,33 +41,69 @@ async def lifespan(app: FastAPI):
     
     # Import and initialize bot
     try:
-        from core.bot import bot_instance as main_bot
+        with profiler.stage("config load"):
+            import config
+        with profiler.stage("core import"):
+            from core.bot import bot_instance as main_bot
         bot_instance = main_bot
         
-        # Load commands and events
-        from core.handler.commands import load_commands, register_commands
-        from core.handler.events import load_events, register_events
-        
-        loaded, failed = load_commands()
-        logger.info(f"Commands loaded: {loaded}, failed: {failed}")
+        # Warm up the API connection pool and cache the bot identity once;
+        # /info and /health never call Telegram
+        with profiler.stage("get_me"):
+            me = await main_bot.get_bot_info()
+        if me:
+            logger.info(f"Running as @{me.username} ({me.id})")
         
-        register_commands()
-        logger.info("Commands registered")
-        
-        loaded, failed = load_events()
-        logger.info(f"Events loaded: {loaded}, failed: {failed}")
-        
-        register_events()
-        logger.info("Events registered")
+        from core.database import PROCESS_LOCKS
+        from core.sharding import shard_pool
+        if config.WEBHOOK_WORKERS > 1 and not PROCESS_LOCKS:
+            # Shards would overwrite each other's JSON database writes
+            logger.warning(
+                "WEBHOOK_WORKERS > 1 needs file locking, which this platform "
+                "lacks; running a single webhook process"
+            )
+        if config.WEBHOOK_WORKERS > 1 and PROCESS_LOCKS:
+            # Shard processes load commands and events themselves
+            with profiler.stage("start shards"):
+                shard_pool.start()
+            from core.metrics import metrics
+            metrics.track_queue_depth(lambda: shard_pool.stats["depth"])
+            from core.loop_monitor import loop_monitor
+            loop_monitor.start()
+        else:
+            # Load commands and events
+            from core.handler.commands import load_commands, register_commands
+            from core.handler.events import load_events, register_events
+            
+            with profiler.stage("load commands"):
+                loaded, failed = load_commands()
+            logger.info(f"Commands loaded: {loaded}, failed: {failed}")
+            
+            with profiler.stage("register commands"):
+                register_commands()
+            logger.info("Commands registered")
+            
+            with profiler.stage("load events"):
+                loaded, failed = load_events()
+            logger.info(f"Events loaded: {loaded}, failed: {failed}")
+            
+            register_events()
+            logger.info("Events registered")
         
         # Setup webhook if in webhook mode
         if os.getenv("WEBHOOK_URL") and os.getenv("HOSTING_MODE") != "polling":
-            success = await main_bot.setup_webhook()
+            with profiler.stage("webhook setup"):
+                success = await main_bot.setup_webhook()
             if success:
                 logger.info("Webhook setup completed")
             else:
                 logger.warning("Webhook setup failed")
         
+        # Update scheduler, hot reload watcher, import warm-up and other background services
+        if not shard_pool.running:
+            main_bot.start_background_services()
+        
+        profiler.report()
         logger.info("Bot initialized successfully")
         
     except Exception as e:
@@ -67,6 +114,20 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down bot server...")
+    from core.downloads import download_service
+    from core.hot_reload import hot_reloader
+    from core.loop_monitor import loop_monitor
+    from core.sharding import shard_pool
+    from core.youtube import youtube_search
+    hot_reloader.stop()
+    loop_monitor.stop()
+    if shard_pool.running:
+        await asyncio.to_thread(shard_pool.stop)
+    if bot_instance:
+        await bot_instance.scheduler.stop()
+        await bot_instance.heavy_tasks.stop()
+        download_service.shutdown()
+        await youtube_search.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -95,7 +156,8 @@ async def root():
         "endpoints": {
             "webhook": "/webhook",
             "health": "/health",
-            "info": "/info"
+            "info": "/info",
+            "metrics": "/metrics"
         }
     }
 
@@ -105,9 +167,28 @@ async def health_check():
     try:
         # Check if bot is initialized
         if bot_instance and hasattr(bot_instance, 'bot'):
+            # Everything below is in-memory state; no external calls
+            from core.database import db
+            from core.downloads import download_service
+            from core.loop_monitor import loop_monitor
+            from core.ratelimit import rate_limiter
+            from core.sharding import shard_pool
+            queue_stats = shard_pool.stats if shard_pool.running else bot_instance.scheduler.stats
+            me = bot_instance.me
+            degraded = (
+                loop_monitor.lag >= loop_monitor.threshold
+                or queue_stats["depth"] >= 0.9 * queue_stats["max_depth"]
+            )
             return {
-                "status": "healthy",
+                "status": "degraded" if degraded else "healthy",
                 "bot_status": "initialized",
+                "bot": {"id": me.id, "username": me.username} if me else None,
+                "update_queue": queue_stats,
+                "event_loop": loop_monitor.stats,
+                "storage": db.flush_stats,
+                "outbound": rate_limiter.stats,
+                "heavy_tasks": bot_instance.heavy_tasks.stats,
+                "downloads": download_service.stats,
                 "service": "KOMIHUB Bot"
             }
         else:
@@ -135,7 +216,13 @@ async def bot_info():
     """Bot information endpoint"""
     try:
         if bot_instance and hasattr(bot_instance, 'bot'):
-            bot_info = await bot_instance.bot.get_me()
+            # Cached after the first successful call
+            bot_info = bot_instance.me or await bot_instance.get_bot_info()
+            if bot_info is None:
+                return JSONResponse(
+                    status_code=503,
+                    content={"error": "Bot info not available yet"}
+                )
             return {
                 "bot_name": bot_info.first_name,
                 "bot_username": bot_info.username,
@@ -155,6 +242,18 @@ async def bot_info():
             content={"error": "Failed to get bot info"}
         )
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics endpoint"""
+    from core.metrics import metrics
+    if not metrics.enabled:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "prometheus-client is not installed"}
+        )
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 @app.post("/webhook")
 async def telegram_webhook(request: Request):
     """Telegram webhook endpoint"""
@@ -162,16 +261,65 @@ async def telegram_webhook(request: Request):
         if not bot_instance:
             raise HTTPException(status_code=503, detail="Bot not initialized")
         
-        # Get the update data
-        update_data = await request.json()
-        logger.info(f"Received webhook update: {update_data.get('update_id', 'unknown')}")
+        # Reject forged requests before reading or parsing the body
+        secret = bot_instance.webhook_secret
+        if secret and not hmac.compare_digest(
+            request.headers.get(SECRET_TOKEN_HEADER, ""), secret
+        ):
+            raise HTTPException(status_code=401, detail="Invalid secret token")
         
-        # Process the update through the bot's dispatcher
+        # Validate the raw body straight into the Update model, bound to our bot
         from aiogram.types import Update
-        update = Update(**update_data)
-        await bot_instance.process_update(update)
+        from pydantic import ValidationError
+        body = await request.body()
+        try:
+            update = Update.model_validate_json(body, context={"bot": bot_instance.bot})
+        except ValidationError as e:
+            logger.warning(f"Invalid webhook update: {e.error_count()} validation errors")
+            raise HTTPException(status_code=400, detail="Invalid update")
+        
+        from core.metrics import metrics
+        metrics.updates_received.labels("webhook").inc()
         
-        return {"status": "ok", "processed": True}
+        if update.update_id % UPDATE_LOG_SAMPLE_RATE == 0:
+            logger.info(f"Received webhook update: {update.update_id}")
+        else:
+            logger.debug(f"Received webhook update: {update.update_id}")
+        
+        # With worker processes, forward the raw body to the shard owning the chat
+        from core.sharding import shard_pool
+        if shard_pool.running:
+            from core.bot import update_chat_key
+            if not shard_pool.submit(update_chat_key(update), body):
+                metrics.updates_rejected.labels("webhook").inc()
+                raise HTTPException(status_code=503, detail="Update queue full")
+            return {"status": "ok", "queued": True}
+        
+        # Cheap commands may answer in the webhook response instead of a new request
+        from core.webhook_reply import webhook_replies
+        me = bot_instance.me
+        inline = webhook_replies.is_eligible(
+            update, bot_instance.get_command_handler, me.username if me else None
+        )
+        if inline:
+            webhook_replies.expect(update.update_id)
+        
+        # Hand off to the scheduler; other updates are acknowledged right away
+        if not bot_instance.scheduler.submit(update):
+            webhook_replies.discard(update.update_id)
+            metrics.updates_rejected.labels("webhook").inc()
+            # Telegram redelivers the update once we are below the max depth
+            raise HTTPException(status_code=503, detail="Update queue full")
+        
+        if inline:
+            reply = await webhook_replies.wait(update.update_id, INLINE_REPLY_TIMEOUT)
+            if reply:
+                return Response(
+                    content=urlencode(reply),
+                    media_type="application/x-www-form-urlencoded",
+                )
+        
+        return {"status": "ok", "queued": True}
         
     except HTTPException:
         raise
@@ -193,7 +341,9 @@ async def set_webhook(request: Request):
             raise HTTPException(status_code=400, detail="Webhook URL required")
         
         # Set webhook
-        result = await bot_instance.bot.set_webhook(webhook_url)
+        result = await bot_instance.bot.set_webhook(
+            webhook_url, secret_token=bot_instance.webhook_secret
+        )
         
         return {
             "status": "ok",